@@ -0,0 +1,242 @@
+bl_info = {
+    "name": "EASEtool: Draw Profiler",
+    "author": "Kidney",
+    "version": (1, 0, 0),
+    "blender": (3, 5, 0),
+    "location": "3D View > Sidebar > Materials",
+    "description": "Opt-in draw time profiler for the EASEtool panels, menus and lists",
+    "warning": "Debug tool, adds overhead to every EASEtool redraw while enabled",
+    "doc_url": "",
+    "category": "Development",
+}
+
+import bpy, time, csv, os
+from collections import deque
+from bpy.types import Panel, Menu, UIList, Operator
+from bpy.props import BoolProperty, IntProperty, StringProperty
+
+#############################################################
+####   FUNCTIONS    #########################################
+#############################################################
+
+## Methods that run on every redraw
+DRAW_METHODS = ("draw", "draw_item", "filter_items")
+
+## "Class.method" -> recent durations in ms
+samples = {}
+## (class, method name) -> original function
+originals = {}
+
+def get_window() -> int:
+    wm = bpy.context.window_manager
+    return wm.easetool_profile_window if hasattr(wm, "easetool_profile_window") else 240
+
+def record(key: str, duration: float):
+    """
+    store one duration in the rolling window of key
+    """
+    window = samples.get(key)
+    if window is None:
+        window = samples[key] = deque(maxlen=get_window())
+    window.append(duration)
+
+def wrap(cls, name: str):
+    """
+    replace a draw method with one that records its wall time
+    blender looks the method up on every call, so registered classes pick it up right away
+    """
+    original = cls.__dict__[name]
+    key = cls.__name__ + "." + name
+    
+    def timed(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return original(self, *args, **kwargs)
+        finally:
+            record(key, (time.perf_counter() - start) * 1000)
+            
+    originals[(cls, name)] = original
+    setattr(cls, name, timed)
+    
+def all_subclasses(cls):
+    for sub in cls.__subclasses__():
+        yield sub
+        yield from all_subclasses(sub)
+
+def find_draw_methods() -> []:
+    """
+    find draw methods of the EASEtool UI classes
+    """
+    methods = []
+    for base in (Panel, Menu, UIList, Operator):
+        for cls in all_subclasses(base):
+            if not cls.__name__.startswith("EASEtool") or cls in classes:
+                continue
+            for name in DRAW_METHODS:
+                ## Only methods the class defines itself, inherited ones are wrapped on their class
+                if name in cls.__dict__:
+                    methods.append((cls, name))
+                    
+    return methods
+
+def instrument():
+    for cls, name in find_draw_methods():
+        if (cls, name) not in originals:
+            wrap(cls, name)
+
+def restore():
+    for (cls, name), original in originals.items():
+        setattr(cls, name, original)
+    originals.clear()
+    
+def percentile(values: [], p: float) -> float:
+    """
+    percentile of sorted values, nearest rank
+    """
+    if not values:
+        return 0.0
+    index = min(int(round(p / 100 * (len(values) - 1))), len(values) - 1)
+    return values[index]
+
+def get_stats() -> []:
+    """
+    rows of name, count, mean, p50, p95, max in ms, slowest p95 first
+    """
+    rows = []
+    for key, window in samples.items():
+        values = sorted(window)
+        if not values:
+            continue
+        rows.append((key, len(values), sum(values) / len(values),
+                     percentile(values, 50), percentile(values, 95), values[-1]))
+    rows.sort(key=lambda row: row[4], reverse=True)
+    
+    return rows
+
+def toggle_profile(self, context):
+    if self.easetool_profile:
+        instrument()
+    else:
+        restore()
+        
+def resize_window(self, context):
+    for key, window in samples.items():
+        samples[key] = deque(window, maxlen=self.easetool_profile_window)
+
+
+#############################################################
+####   OPERATORS    #########################################
+#############################################################
+
+class EASEtool_OT_Profile_Reset(Operator):
+    """Clear recorded draw times"""
+    bl_idname = "easetool.profile_reset"
+    bl_label = "Reset Draw Times"
+    
+    def execute(self, context):
+        samples.clear()
+        
+        return {'FINISHED'}
+    
+class EASEtool_OT_Profile_Export(Operator):
+    """Write draw time percentiles to a CSV file"""
+    bl_idname = "easetool.profile_export"
+    bl_label = "Export Draw Times"
+    
+    filepath: StringProperty( name = "File Path", subtype = 'FILE_PATH', default = "//easetool_draw_profile.csv")
+    
+    def execute(self, context):
+        ## Relative paths need a saved file, otherwise use the temp folder
+        if self.filepath.startswith("//") and not bpy.data.filepath:
+            path = os.path.join(bpy.app.tempdir, self.filepath[2:])
+        else:
+            path = bpy.path.abspath(self.filepath)
+        
+        with open(path, "w", newline="") as file:
+            writer = csv.writer(file)
+            writer.writerow(["method", "count", "mean_ms", "p50_ms", "p95_ms", "max_ms"])
+            for row in get_stats():
+                writer.writerow([row[0], row[1]] + ["%.4f" % v for v in row[2:]])
+        
+        self.report({'INFO'}, "Saved " + path)
+        
+        return {'FINISHED'}
+    
+
+#############################################################
+####    UI    ###############################################
+#############################################################
+
+class EASEtool_PT_Draw_Profiler(Panel):
+    """Draw time of EASEtool UI classes"""
+    bl_label = "EASEtool: Draw Profiler"
+    bl_idname = "EASETOOL_PT_draw_profiler"
+    bl_space_type = 'VIEW_3D'
+    bl_region_type = 'UI'
+    bl_category = 'Materials'
+    bl_options = {'DEFAULT_CLOSED'}
+    
+    def draw(self, context):
+        wm = context.window_manager
+        
+        layout = self.layout
+        col = layout.column(align=True)
+        
+        row = col.row(align=True)
+        row.prop(wm, "easetool_profile", text="Record Draw Times", toggle=True, icon="REC")
+        row.prop(wm, "easetool_profile_window", text="")
+        
+        row = col.row(align=True)
+        row.operator("easetool.profile_reset", icon="X")
+        row.operator("easetool.profile_export", icon="EXPORT")
+        
+        stats = get_stats()
+        if not stats:
+            col.label(text="No draw times recorded")
+            return
+        
+        ## Times in ms
+        box = col.box()
+        c = box.column(align=True)
+        header = c.split(factor=0.5)
+        header.label(text="Method")
+        r = header.row()
+        for text in ("p50", "p95", "max"):
+            r.label(text=text)
+        
+        for name, count, mean, p50, p95, high in stats:
+            row = c.split(factor=0.5)
+            row.label(text=name.replace("EASEtool_", ""))
+            r = row.row()
+            for value in (p50, p95, high):
+                r.label(text="%.2f" % value)
+        
+
+#############################################################
+####    REGISTRATION    #####################################
+#############################################################
+
+classes = [ EASEtool_OT_Profile_Reset, EASEtool_OT_Profile_Export, EASEtool_PT_Draw_Profiler ]
+
+from bpy.utils import register_class, unregister_class
+
+def register():
+    for c in classes:
+        register_class(c)
+    
+    ## Window manager properties are not saved with the file, profiling is always off on load
+    bpy.types.WindowManager.easetool_profile = BoolProperty( name = "Record Draw Times", description = "Record draw times of EASEtool panels, menus and lists", default = False, update = toggle_profile)
+    bpy.types.WindowManager.easetool_profile_window = IntProperty( name = "Samples", description = "Nr of recent draws kept per method", default = 240, min = 10, max = 10000, update = resize_window)
+
+def unregister():
+    restore()
+    samples.clear()
+    
+    for c in classes:
+        unregister_class(c)
+        
+    del bpy.types.WindowManager.easetool_profile
+    del bpy.types.WindowManager.easetool_profile_window
+
+if __name__ == "__main__":
+    register()
@@ -10,11 +10,13 @@ bl_info = {
     "category": "Material",
 }
 
-import bpy
+import bpy, bmesh
+import numpy as np
+from bpy.app.handlers import persistent
 from bpy.types import UIList, Panel, Operator, PropertyGroup
 from bpy.props import IntProperty, StringProperty, BoolProperty, PointerProperty, FloatVectorProperty, EnumProperty
 from random import random, uniform
-import colorsys
+import colorsys, csv
 
 #############################################################
 ####    PROPERTIES    #######################################
@@ -27,8 +29,8 @@ class EASEtool_Material_Property_Group(PropertyGroup):
     ## Remove Material From Object    
     delete_slot: BoolProperty( name = "Delete Material Slot", description = "Delete material slot of removed materials", default = False)
     
-    ## Delete Unused Material Slots
-    keep_original: BoolProperty( name = "Keep Original Selection", description = "Keep original selection after removing material slots from all", default = True)
+    ## Delete Orphan Materials
+    purge_recursive: BoolProperty( name = "Recursive", description = "Also delete node groups, textures and images left without users by the removed materials", default = False)
     
     ## Add Material To Selection
     overwrite_original: BoolProperty( name = "Overwrite Original Materials", description = "Remove old material slots after adding selected", default = False)
@@ -39,6 +41,14 @@ class EASEtool_Material_Property_Group(PropertyGroup):
     new_name: StringProperty( name = "Name", description = "Name of new material", default = "Material")
     new_color: FloatVectorProperty( name="Color", description = "Color of new material", subtype='COLOR', size=4, 
         default=(1.0, 1.0, 1.0, 1.0), min=0.0, max=1.0)
+    new_count: IntProperty( name = "Count", description = "Nr of materials to create", default = 1, min = 1)
+    new_palette: EnumProperty( name = "Palette", description = "Colors of new materials",
+        items=[("COLOR", "Color", "Color above, or random colors"),
+        ("GOLDEN", "Golden Ratio", "Evenly spread hues, starting from a random one"),
+        ("CSV", "CSV File", "Colors from a CSV file, one r, g, b(, a) or hex color per row")],
+        default = "COLOR")
+    palette_path: StringProperty( name = "CSV File", description = "CSV file with colors", default = "", subtype = 'FILE_PATH')
+    assign_selected: BoolProperty( name = "Assign To Selected", description = "Create one material per selected object and assign it", default = False)
     new_shader: EnumProperty( name = "Shader Type", description = "Shader of new material",
         items=[("ShaderNodeBsdfPrincipled", "Principled BSDF", 'principled'),
         ("ShaderNodeBsdfDiffuse", "Diffuse BSDF", 'diffuse'),
@@ -51,6 +61,10 @@ class EASEtool_Material_Property_Group(PropertyGroup):
         
         default = "ShaderNodeBsdfPrincipled")
     
+    ## Colorize Materials
+    auto_colorize: BoolProperty( name = "Auto Colorize", description = "Keep diffuse colors in sync with shader colors while editing",
+        default = False, update = lambda self, context: sync_auto_colorize())
+    
     
 
 #############################################################
@@ -65,10 +79,11 @@ class EASEtool_UL_Material_List(UIList):
                 row = layout.row(translate=False)
                 row.prop(item, "name", text="", emboss=False, icon_value=icon)
                 
-                material = bpy.data.materials.get(item.name)
+                material = item
                 row = row.row(translate=False, align = True)
                 row.alignment = 'RIGHT'
-                row.label(text=str(material.users))
+                ## Nr of objects using the material, from the cached index
+                row.label(text=str(len(get_material_users(material))), icon="OBJECT_DATA")
                 row.prop(material, "use_fake_user", text="", emboss=False)
                 
                 props = context.scene.ease_mat_prop_grp
@@ -93,6 +108,25 @@ class EASEtool_UL_Material_List(UIList):
         elif self.layout_type == 'GRID':
             layout.alignment = 'CENTER'
             layout.label(text="", icon_value=icon)
+            
+    def filter_items(self, context, data, propname):
+        ## Hide the preset library, other materials starting with a dot stay visible
+        materials = getattr(data, propname)
+        helper = bpy.types.UI_UL_list
+        
+        if self.filter_name:
+            flt_flags = helper.filter_items_by_name(self.filter_name, self.bitflag_filter_item, materials, "name", reverse=False)
+        else:
+            flt_flags = [self.bitflag_filter_item] * len(materials)
+        for i, material in enumerate(materials):
+            if material.name.startswith(PRESET_PREFIX):
+                flt_flags[i] = 0
+                
+        flt_neworder = []
+        if self.use_filter_sort_alpha:
+            flt_neworder = helper.sort_items_by_name(materials, "name")
+            
+        return flt_flags, flt_neworder
  
 #############################################################
 ####   FUNCTIONS    #########################################
@@ -113,6 +147,775 @@ def get_objects(selected: bool) -> []:
 def any_materials() -> bool:
     return len(bpy.data.materials) > 0
 
+def new_material(name: str, color: (), shader_type: str):
+    """
+    create a material with one shader connected to the output
+    shader_type - node type of the shader, eg. 'ShaderNodeBsdfPrincipled'
+    """
+    material = bpy.data.materials.new(name=name)
+    
+    material.use_nodes = True
+    tree = material.node_tree
+    nodes = tree.nodes
+    
+    nodes.clear()
+    ## Add Shader
+    shader = nodes.new(shader_type)
+    shader.inputs[0].default_value = color
+    ## Add Output
+    output = nodes.new("ShaderNodeOutputMaterial")
+    ## Connect nodes
+    tree.links.new(shader.outputs[0], output.inputs[0])
+
+    material.diffuse_color = color
+    
+    return material
+
+## Hue step spreading any number of colors evenly around the color wheel
+GOLDEN_RATIO_CONJUGATE = 0.618033988749895
+
+def golden_palette(count: int, hue: float = None) -> []:
+    """
+    colors with hues a golden ratio apart, neighbours always differ
+    hue - first hue, random by default
+    """
+    if hue is None:
+        hue = random()
+    hues = (hue + GOLDEN_RATIO_CONJUGATE * np.arange(count)) % 1.0
+    
+    return [(*colorsys.hsv_to_rgb(h, 0.8, 1.0), 1.0) for h in hues.tolist()]
+
+def read_palette(path: str) -> []:
+    """
+    read colors from a CSV file, rows that aren't colors are skipped
+    a row is r, g, b(, a) in 0-1 or 0-255, or a hex color like #ff8000
+    """
+    colors = []
+    with open(bpy.path.abspath(path), newline="") as file:
+        for row in csv.reader(file):
+            row = [c.strip() for c in row if c.strip()]
+            if not row:
+                continue
+            try:
+                if row[0].startswith("#"):
+                    digits = row[0][1:]
+                    values = [int(digits[i:i + 2], 16) / 255 for i in range(0, len(digits), 2)]
+                else:
+                    values = [float(c) for c in row[:4]]
+                    if max(values) > 1.0:
+                        values = [v / 255 for v in values]
+            except ValueError:
+                ## Header or comment
+                continue
+            if len(values) >= 3:
+                colors.append((*values[:3], values[3] if len(values) > 3 else 1.0))
+                
+    return colors
+
+def build_face_strength(material):
+    """face strength attribute -> color ramp -> emission, weak blue, medium green, strong red"""
+    tree = material.node_tree
+    nodes = tree.nodes
+    material.diffuse_color = (1,0,0.5,1)
+    
+    attribute_node = nodes.new('ShaderNodeAttribute')
+    attribute_node.attribute_name  = '__mod_weightednormals_faceweight'
+    attribute_node.location = (0, 0)
+
+    math_node = nodes.new('ShaderNodeMath')
+    math_node.operation = 'ADD'
+    math_node.location = (200, 0)
+
+    ramp_node = nodes.new('ShaderNodeValToRGB')
+    ramp_node.color_ramp.interpolation = 'CONSTANT'
+    ramp_node.color_ramp.elements[0].position = 0
+    ramp_node.color_ramp.elements[0].color = (0.1, 0.136, 1, 1)
+    ramp_node.color_ramp.elements[1].position = 0.33
+    ramp_node.color_ramp.elements[1].color = (0.118, 1, 0.1, 1)
+    ramp_node.color_ramp.elements.new(0.66)
+    ramp_node.color_ramp.elements[2].color = (1, 0.1, 0.1, 1)
+    ramp_node.location = (400, 0)
+
+    emission_node = nodes.new('ShaderNodeEmission')
+    emission_node.inputs[0].default_value = (1,0,0.5,1)
+    emission_node.location = (700, 0)
+
+    output_node = nodes.new('ShaderNodeOutputMaterial')
+    output_node.location = (900, 0)
+
+    links = tree.links
+    links.new(attribute_node.outputs['Fac'], math_node.inputs[0])
+    links.new(math_node.outputs['Value'], ramp_node.inputs['Fac'])
+    links.new(ramp_node.outputs['Color'], emission_node.inputs['Color'])
+    links.new(emission_node.outputs['Emission'], output_node.inputs['Surface'])
+
+def build_shader(shader_type: str, color: ()):
+    """preset builder for one shader with a flat color"""
+    def build(material):
+        tree = material.node_tree
+        shader = tree.nodes.new(shader_type)
+        shader.inputs[0].default_value = color
+        output = tree.nodes.new("ShaderNodeOutputMaterial")
+        output.location = (300, 0)
+        tree.links.new(shader.outputs[0], output.inputs[0])
+        material.diffuse_color = color
+        
+    return build
+
+## Shaders new materials can be made with, each gets an ID color preset
+SHADER_TYPES = ["ShaderNodeBsdfPrincipled", "ShaderNodeBsdfDiffuse", "ShaderNodeEmission", "ShaderNodeBsdfGlossy",
+                "ShaderNodeBsdfTransparent", "ShaderNodeBsdfGlass", "ShaderNodeBackground"]
+
+## Preset name -> (version, builder filling an empty node tree), bump the version when a builder changes
+PRESETS = {
+    "face_strength": (1, build_face_strength),
+    "tris": (1, build_shader("ShaderNodeEmission", (0.1, 0.136, 1, 1))),
+    "quads": (1, build_shader("ShaderNodeEmission", (0.118, 1, 0.1, 1))),
+    "ngons": (1, build_shader("ShaderNodeEmission", (1, 0.1, 0.1, 1))),
+}
+## ID color presets are recolored after copying, copies keep their color when upgraded
+PRESETS.update({"id_color " + t: (1, build_shader(t, (1.0, 1.0, 1.0, 1.0))) for t in SHADER_TYPES})
+
+## Names of library materials start with this, the dot hides them from the material list
+PRESET_PREFIX = ".EASEtool Preset "
+
+## Preset name -> name of its library material, checked to be up to date
+## Names, not materials, removing materials and undo free them
+preset_library = {}
+
+def preset_material(name: str):
+    """
+    hidden library material of a preset, built once and rebuilt when its version is stale
+    copies made from it carry the preset name and version as custom properties
+    """
+    library_name = preset_library.get(name)
+    material = bpy.data.materials.get(library_name) if library_name else None
+    if material is not None:
+        return material
+    
+    version, build = PRESETS[name]
+    material = bpy.data.materials.get(PRESET_PREFIX + name)
+    if material is None or material.library is not None:
+        material = bpy.data.materials.new(PRESET_PREFIX + name)
+        ## Nothing uses the library, the fake user keeps it from orphan cleanup
+        material.use_fake_user = True
+        
+    if material.get("easetool_preset_version") != version:
+        material.use_nodes = True
+        material.node_tree.nodes.clear()
+        build(material)
+        material["easetool_preset"] = name
+        material["easetool_preset_version"] = version
+    preset_library[name] = material.name
+        
+    return material
+
+def instance_preset(name: str, material_name: str):
+    """new material copied from a preset"""
+    material = preset_material(name).copy()
+    material.name = material_name
+    material.use_fake_user = False
+    
+    return material
+
+def set_shader_color(material, color: ()):
+    """set the color of the shader linked to the output of a one shader material"""
+    output = active_output(material.node_tree, 'OUTPUT_MATERIAL')
+    if output is not None and output.inputs[0].is_linked:
+        output.inputs[0].links[0].from_node.inputs[0].default_value = color
+    material.diffuse_color = color
+
+def new_materials(name: str, colors: [], shader_type: str) -> []:
+    """
+    create a material per color by copying the ID color preset of the shader
+    copying a node tree is one call, building it adds nodes and links one by one
+    """
+    preset = "id_color " + shader_type
+    if preset not in PRESETS:
+        ## Shader types outside the menu, eg. from scripts
+        PRESETS[preset] = (1, build_shader(shader_type, (1.0, 1.0, 1.0, 1.0)))
+    
+    materials = []
+    for color in colors:
+        material = instance_preset(preset, name)
+        set_shader_color(material, color)
+        materials.append(material)
+        
+    return materials
+
+def stale_presets() -> []:
+    """materials copied from an older version of their preset"""
+    stale = []
+    for material in bpy.data.materials:
+        name = material.get("easetool_preset")
+        if name not in PRESETS or material.library is not None or material.name.startswith(PRESET_PREFIX):
+            continue
+        if material.get("easetool_preset_version") != PRESETS[name][0]:
+            stale.append(material)
+            
+    return stale
+
+@persistent
+def clear_preset_library(*args):
+    """Check library materials again after loading a file, undo, redo or removing materials"""
+    preset_library.clear()
+
+def group_by_data(objects: []) -> {}:
+    """
+    group objects by their data block
+    linked duplicates share one mesh, so data level slots are edited once per mesh
+    """
+    groups = {}
+    for obj in objects:
+        data = obj.data
+        ## Skip empties and other objects without material slots
+        if data is None or not hasattr(data, "materials"):
+            continue
+        groups.setdefault(data, []).append(obj)
+        
+    return groups
+
+def get_material_indices(data):
+    """
+    read material index of every face or spline into an array
+    data - mesh or curve, returns None for data without material indices
+    """
+    if isinstance(data, bpy.types.Mesh):
+        if data.is_editmode:
+            ## Mesh polygons are out of date in edit mode
+            faces = bmesh.from_edit_mesh(data).faces
+            return np.fromiter((f.material_index for f in faces), dtype=np.int32, count=len(faces))
+        elements = data.polygons
+    elif isinstance(data, bpy.types.Curve) and not isinstance(data, bpy.types.TextCurve):
+        elements = data.splines
+    else:
+        return None
+    
+    indices = np.empty(len(elements), dtype=np.int32)
+    elements.foreach_get("material_index", indices)
+    return indices
+
+def set_material_indices(data, indices):
+    """
+    write material index of every face or spline from an array
+    data - mesh or curve, indices - array from get_material_indices
+    """
+    if isinstance(data, bpy.types.Mesh):
+        if data.is_editmode:
+            bm = bmesh.from_edit_mesh(data)
+            for f, i in zip(bm.faces, indices.tolist()):
+                f.material_index = i
+            bmesh.update_edit_mesh(data, loop_triangles=False, destructive=False)
+            return
+        data.polygons.foreach_set("material_index", indices)
+    else:
+        data.splines.foreach_set("material_index", indices)
+    data.update_tag()
+
+def rebuild_material_slots(data, objs: [], order: []):
+    """
+    rebuild material slots of data in one pass, faces keep their materials
+    objs - all objects using data, their object linked slots are moved along
+    order - for every new slot the old slot index, or a material (or None) for a new slot
+    """
+    materials = data.materials
+    old_materials = list(materials)
+    
+    ## Object linked slots live on the objects and are lost when the slots are rebuilt
+    old_links = []
+    for obj in objs:
+        slots = [(slot.link, slot.material) for slot in obj.material_slots]
+        if any(link == 'OBJECT' for link, _ in slots):
+            old_links.append((obj, slots))
+    
+    indices = get_material_indices(data)
+    
+    ## Old slot -> new slot
+    remap = np.zeros(max(len(old_materials), 1), dtype=np.int32)
+    for new, old in enumerate(order):
+        if isinstance(old, int):
+            remap[old] = new
+    
+    materials.clear()
+    for old in order:
+        materials.append(old_materials[old] if isinstance(old, int) else old)
+        
+    ## Remap all face indices at once, out of range indices are clamped like blender draws them
+    if indices is not None and len(indices):
+        indices = remap[np.clip(indices, 0, len(remap) - 1)]
+        set_material_indices(data, indices)
+        
+    for obj, slots in old_links:
+        for new, old in enumerate(order):
+            if isinstance(old, int) and slots[old][0] == 'OBJECT':
+                slot = obj.material_slots[new]
+                slot.link = 'OBJECT'
+                slot.material = slots[old][1]
+
+def remove_unused_slots(data, objs: []) -> int:
+    """
+    remove material slots that no face uses, works on data only so selection and mode stay untouched
+    objs - all objects using data
+    returns number of removed slots
+    """
+    num_slots = len(data.materials)
+    indices = get_material_indices(data)
+    ## Data without material indices (eg. metaballs) keeps its slots
+    if num_slots == 0 or indices is None:
+        return 0
+    
+    used = np.zeros(num_slots, dtype=bool)
+    used[np.clip(indices, 0, num_slots - 1)] = True
+    if used.all():
+        return 0
+    
+    ## Keep used slots in their order and compact the face indices
+    order = np.flatnonzero(used).tolist()
+    rebuild_material_slots(data, objs, order)
+    
+    return num_slots - len(order)
+
+## Material name -> names of objects using it, None when it needs to be rebuilt
+material_users = None
+## Object pointer -> (object name, data pointer, material names), so single objects can be updated in the index
+object_materials = {}
+
+def index_object(obj):
+    """add the materials of obj to the material users index"""
+    names = {slot.material.name for slot in obj.material_slots if slot.material}
+    object_materials[obj.as_pointer()] = (obj.name, obj.data.as_pointer() if obj.data else 0, names)
+    for name in names:
+        material_users.setdefault(name, set()).add(obj.name)
+
+def unindex_object(pointer: int):
+    """remove an object from the material users index by its pointer, the object can be renamed since"""
+    name, data, names = object_materials.pop(pointer)
+    for material in names:
+        users = material_users.get(material)
+        if users:
+            users.discard(name)
+
+def build_material_users() -> {}:
+    """
+    build material to object reverse index
+    one pass over all objects and their material slots
+    """
+    global material_users
+    material_users = {}
+    object_materials.clear()
+    for obj in bpy.data.objects:
+        index_object(obj)
+                
+    return material_users
+
+def get_material_users(material) -> set:
+    """
+    get names of objects using material
+    index is built on first use and kept up to date on depsgraph updates
+    """
+    if material_users is None:
+        build_material_users()
+        
+    return material_users.get(material.name, set())
+
+@persistent
+def invalidate_material_users(scene, depsgraph):
+    """
+    update the material users index for the objects and data in the depsgraph updates
+    material edits, eg. colors, don't change users and are skipped
+    """
+    global material_users
+    if material_users is None:
+        return
+    
+    ## Objects added or deleted, rebuild on next use
+    if len(bpy.data.objects) != len(object_materials):
+        material_users = None
+        return
+    
+    objects = {}
+    data = set()
+    materials = []
+    for update in depsgraph.updates:
+        id = update.id.original
+        if isinstance(id, bpy.types.Object):
+            ## Moving objects around doesn't change material users
+            if update.is_updated_transform and not update.is_updated_geometry:
+                continue
+            objects[id.as_pointer()] = id
+        elif isinstance(id, (bpy.types.Mesh, bpy.types.Curve)):
+            data.add(id.as_pointer())
+        elif isinstance(id, bpy.types.Material):
+            materials.append(id)
+            
+    ## Slots live on the data, update every object using it
+    if data:
+        for pointer, (name, data_pointer, names) in object_materials.items():
+            if data_pointer in data and pointer not in objects:
+                obj = bpy.data.objects.get(name)
+                if obj is not None:
+                    objects[pointer] = obj
+    
+    for pointer, obj in objects.items():
+        if pointer in object_materials:
+            unindex_object(pointer)
+        index_object(obj)
+        
+    ## A used material still missing from the index was renamed
+    for material in materials:
+        if material.users > material.use_fake_user and material.name not in material_users:
+            material_users = None
+            return
+    
+@persistent
+def clear_material_users(*args):
+    """
+    drop the material users index when a file is loaded or an operator changed slots
+    scripts can run operators one after another without a depsgraph update between them
+    """
+    global material_users
+    material_users = None
+    object_materials.clear()
+
+def remove_materials(materials: []) -> int:
+    """
+    remove materials from file in one pass
+    materials - materials to remove, collected before removing
+    returns number of removed materials
+    """
+    materials = list(materials)
+    if materials:
+        ## batch_remove walks the user references once for the whole set, materials.remove does it per material
+        bpy.data.batch_remove(materials)
+        clear_preset_library()
+        
+    return len(materials)
+
+def image_data_size(image) -> int:
+    """
+    estimate bytes held by an image
+    packed file plus loaded pixel buffer
+    """
+    size = 0
+    if image.packed_file:
+        size += image.packed_file.size
+    if image.has_data:
+        width, height = image.size
+        bytes_per_channel = 4 if image.is_float else 1
+        size += width * height * image.channels * bytes_per_channel
+        
+    return size
+
+def find_orphans() -> set:
+    """
+    find materials, node groups, textures and images that nothing reaches
+    builds the reference graph once with user_map and propagates from the orphans to everything only they use
+    """
+    data = bpy.data
+    candidates = set()
+    for collection in (data.materials, data.node_groups, data.textures, data.images):
+        for id in collection:
+            ## Keep linked data and fake users
+            if id.library or id.use_fake_user:
+                continue
+            ## Keep generated render and compositing results
+            if isinstance(id, bpy.types.Image) and id.type in {'RENDER_RESULT', 'COMPOSITING'}:
+                continue
+            candidates.add(id)
+            
+    if not candidates:
+        return set()
+    
+    ## live_users - nr of ids still using a candidate, uses - candidates used by each id
+    live_users = {}
+    uses = {}
+    for id, users in data.user_map(subset=candidates).items():
+        users.discard(id)
+        live_users[id] = len(users)
+        for user in users:
+            uses.setdefault(user, []).append(id)
+    
+    ## Start from real orphans, ids with users outside of the ID graph (eg. image editor) are kept
+    stack = [id for id, count in live_users.items() if count == 0 and id.users == 0]
+    orphans = set()
+    while stack:
+        id = stack.pop()
+        orphans.add(id)
+        ## Anything used only by removed ids becomes an orphan too
+        for used in uses.get(id, ()):
+            live_users[used] -= 1
+            if live_users[used] == 0:
+                stack.append(used)
+                
+    return orphans
+
+## Material name -> (version, color) of the last colorize, color is None when nothing resolves
+material_colors = {}
+## Material name -> change counter, bumped by the depsgraph handler
+material_versions = {}
+## Node group name -> names of materials using it, None when it needs to be rebuilt
+group_materials = None
+
+## Nested groups and reroutes deeper than this are ignored
+MAX_NODE_DEPTH = 32
+
+def active_output(tree, node_type: str):
+    """
+    active output node of a tree found by type, names can be localized or renamed
+    node_type - 'OUTPUT_MATERIAL' or 'GROUP_OUTPUT'
+    """
+    for node in tree.nodes:
+        if node.type == node_type and node.is_active_output:
+            return node
+    return None
+
+def socket_color(socket, depth: int = 0):
+    """
+    follow the link into socket to the color of the dominant shader
+    mix shaders follow the side with more weight, add shaders the first side that resolves
+    returns rgba tuple or None
+    """
+    if not socket.is_linked or depth > MAX_NODE_DEPTH:
+        return None
+    link = socket.links[0]
+    if not link.is_valid or link.is_muted:
+        return None
+    node = link.from_node
+    
+    if node.type == 'REROUTE':
+        return socket_color(node.inputs[0], depth + 1)
+    
+    if node.type == 'MIX_SHADER':
+        fac = node.inputs[0]
+        ## A linked factor could be anything, take the first shader like for a half mix
+        weight = 0.5 if fac.is_linked else fac.default_value
+        first, second = (node.inputs[2], node.inputs[1]) if weight > 0.5 else (node.inputs[1], node.inputs[2])
+        color = socket_color(first, depth + 1)
+        return color if color is not None else socket_color(second, depth + 1)
+    
+    if node.type == 'ADD_SHADER':
+        color = socket_color(node.inputs[0], depth + 1)
+        return color if color is not None else socket_color(node.inputs[1], depth + 1)
+    
+    if node.type == 'GROUP':
+        if node.node_tree is None:
+            return None
+        output = active_output(node.node_tree, 'GROUP_OUTPUT')
+        if output is None:
+            return None
+        ## Group output input matching the linked group node output
+        identifier = link.from_socket.identifier
+        for group_socket in output.inputs:
+            if group_socket.identifier == identifier:
+                return socket_color(group_socket, depth + 1)
+        return None
+    
+    ## Shaders, the first color input is their base color
+    for input in node.inputs:
+        if input.type == 'RGBA':
+            return tuple(input.default_value)
+    return None
+
+def shader_color(material):
+    """
+    color of the dominant shader of a material
+    None without nodes or with an unlinked output
+    """
+    if not material.use_nodes or material.node_tree is None:
+        return None
+    output = active_output(material.node_tree, 'OUTPUT_MATERIAL')
+    if output is None:
+        return None
+    
+    return socket_color(output.inputs['Surface'])
+
+def colorize_materials(materials, force: bool = False) -> int:
+    """
+    set diffuse color of materials to their shader color
+    only materials changed since the last run are resolved again
+    force - resolve all materials
+    returns number of changed materials
+    """
+    changed = 0
+    for material in materials:
+        name = material.name
+        version = material_versions.get(name, 0)
+        cached = material_colors.get(name)
+        if cached is not None and cached[0] == version and not force:
+            continue
+        
+        color = shader_color(material)
+        material_colors[name] = (version, color)
+        ## Writing bumps the version once more, the next run resolves it again but doesn't write
+        if color is not None and tuple(material.diffuse_color) != color:
+            material.diffuse_color = color
+            changed += 1
+            
+    return changed
+
+## ('MATERIAL' or 'GROUP', name) -> names of the node groups a tree uses directly, as seen by the last index build
+tree_groups = {}
+
+def used_groups(tree) -> []:
+    """node groups used directly by the group nodes of a tree"""
+    return [node.node_tree for node in tree.nodes if node.type == 'GROUP' and node.node_tree is not None]
+
+def build_group_materials() -> {}:
+    """
+    build node group to material reverse index, nested groups included
+    also remembers the groups every tree uses, to tell when the index is out of date
+    """
+    index = {}
+    tree_groups.clear()
+    for material in bpy.data.materials:
+        if material.node_tree is None:
+            continue
+        groups = used_groups(material.node_tree)
+        tree_groups[('MATERIAL', material.name)] = frozenset(g.name for g in groups)
+        
+        stack = groups
+        seen = set()
+        while stack:
+            tree = stack.pop()
+            if tree.name in seen:
+                continue
+            seen.add(tree.name)
+            groups = used_groups(tree)
+            tree_groups[('GROUP', tree.name)] = frozenset(g.name for g in groups)
+            stack.extend(groups)
+        for name in seen:
+            index.setdefault(name, set()).add(material.name)
+            
+    return index
+
+def groups_changed(key: (), tree) -> bool:
+    """
+    True when a tree uses other node groups than at the last index build
+    only walks the nodes of this tree, groups nothing indexed can't affect materials
+    """
+    if tree is None:
+        return key in tree_groups
+    known = tree_groups.get(key)
+    current = frozenset(g.name for g in used_groups(tree))
+    if known is None:
+        ## New or renamed group something uses
+        return bool(current) if key[0] == 'MATERIAL' else tree.users > 0
+    
+    return known != current
+
+@persistent
+def invalidate_material_colors(scene, depsgraph):
+    """Bump the version of materials whose node tree or used node groups changed"""
+    global group_materials
+    if not material_colors:
+        return
+    
+    outdated = False
+    for update in depsgraph.updates:
+        id = update.id.original
+        if isinstance(id, bpy.types.Material):
+            material_versions[id.name] = material_versions.get(id.name, 0) + 1
+            key, tree = ('MATERIAL', id.name), id.node_tree
+        elif isinstance(id, bpy.types.ShaderNodeTree) and not id.is_embedded_data:
+            if group_materials is None:
+                group_materials = build_group_materials()
+            for name in group_materials.get(id.name, ()):
+                material_versions[name] = material_versions.get(name, 0) + 1
+            key, tree = ('GROUP', id.name), id
+        else:
+            continue
+        ## Most edits change values, only group nodes added or removed make the index stale
+        if group_materials is not None and not outdated:
+            outdated = groups_changed(key, tree)
+            
+    if outdated:
+        group_materials = None
+        
+@persistent
+def clear_material_colors(*args):
+    """Drop cached colors when a file is loaded"""
+    global group_materials
+    material_colors.clear()
+    material_versions.clear()
+    tree_groups.clear()
+    group_materials = None
+
+## Seconds without edits before auto colorize writes colors, bursts of edits become one update
+AUTO_COLORIZE_DELAY = 0.25
+## Names of materials auto colorize resolves on the next flush
+pending_colorize = set()
+## Msgbus owner of the auto colorize subscriptions
+auto_colorize_owner = object()
+
+def flush_auto_colorize():
+    """Timer resolving materials changed since the last flush"""
+    materials = bpy.data.materials
+    changed = [materials[name] for name in pending_colorize if name in materials]
+    pending_colorize.clear()
+    ## Writing colors triggers one more flush, which finds them unchanged and stops
+    colorize_materials(changed)
+    
+    return None
+
+def schedule_auto_colorize():
+    """Restart the flush timer, so it runs once edits stop"""
+    if bpy.app.timers.is_registered(flush_auto_colorize):
+        bpy.app.timers.unregister(flush_auto_colorize)
+    bpy.app.timers.register(flush_auto_colorize, first_interval=AUTO_COLORIZE_DELAY)
+
+@persistent
+def auto_colorize_update(scene, depsgraph):
+    """Collect materials whose node trees changed, node groups count for all their materials"""
+    global group_materials
+    found = False
+    for update in depsgraph.updates:
+        id = update.id.original
+        if isinstance(id, bpy.types.Material):
+            pending_colorize.add(id.name)
+            found = True
+        elif isinstance(id, bpy.types.ShaderNodeTree) and not id.is_embedded_data:
+            if group_materials is None:
+                group_materials = build_group_materials()
+            pending_colorize.update(group_materials.get(id.name, ()))
+            found = True
+            
+    if found:
+        schedule_auto_colorize()
+        
+def auto_colorize_notify():
+    """Msgbus callback for node tree and use nodes changes the depsgraph doesn't report"""
+    pending_colorize.update(bpy.data.materials.keys())
+    schedule_auto_colorize()
+
+def sync_auto_colorize():
+    """
+    start or stop auto colorize to match the scene toggles
+    msgbus subscriptions don't survive loading a file, so this also runs after load
+    """
+    enabled = any(scene.ease_mat_prop_grp.auto_colorize for scene in bpy.data.scenes)
+    handlers = bpy.app.handlers.depsgraph_update_post
+    
+    bpy.msgbus.clear_by_owner(auto_colorize_owner)
+    if enabled:
+        if auto_colorize_update not in handlers:
+            handlers.append(auto_colorize_update)
+            ## Start from colors in sync, later edits only touch what changed
+            colorize_materials(bpy.data.materials)
+        for property in ("node_tree", "use_nodes"):
+            bpy.msgbus.subscribe_rna(key=(bpy.types.Material, property), owner=auto_colorize_owner,
+                                     args=(), notify=auto_colorize_notify)
+    else:
+        if auto_colorize_update in handlers:
+            handlers.remove(auto_colorize_update)
+        if bpy.app.timers.is_registered(flush_auto_colorize):
+            bpy.app.timers.unregister(flush_auto_colorize)
+        pending_colorize.clear()
+        
+@persistent
+def restore_auto_colorize(*args):
+    """Subscribe again after a file is loaded"""
+    sync_auto_colorize()
+
 
 
 #############################################################
@@ -138,8 +941,8 @@ class EASEtool_OT_Delete_Materials(Operator):
         
         if self.delete_all: ## if delete_all don't need to check for index, just remove all and return
             context.scene.ease_mat_prop_grp.material_index = 0
-            for i in range(len(materials) -1, -1, -1):
-                materials.remove(materials[i])
+            remove_materials(materials)
+            clear_material_users()
                 
             return {'FINISHED'}
         
@@ -148,8 +951,14 @@ class EASEtool_OT_Delete_Materials(Operator):
         index = self.index
         
         if index > -1: ## If Out of range don't delete anything, not sure this is the best, but it seems reasonable
+            ## The list index can still point at a hidden library material
+            if materials[index].name.startswith(PRESET_PREFIX):
+                self.report({'WARNING'}, "Preset library materials are deleted with Delete All")
+                return {'CANCELLED'}
             context.scene.ease_mat_prop_grp.material_index -= 1
             materials.remove(materials[index])
+            clear_material_users()
+            clear_preset_library()
                     
             
         return {'FINISHED'}
@@ -164,17 +973,27 @@ class EASEtool_OT_Delete_Unused_Materials(Operator):
     def poll(cls, context):
         # Check if there are any materials in the blend file
         return any_materials()
+    
+    recursive: BoolProperty( name = "Recursive", description = "Also delete node groups, textures and images left without users", default = False)
         
     def execute(self, context):
         ## Set Index to 0 to avoid index out of range error
         context.scene.ease_mat_prop_grp.material_index = 0
         
-        materials = bpy.data.materials
-        ## Loop Material List
-        for i in range(len(materials) -1, -1, -1):
-            ## If users == 0 remove
-            if materials[i].users == 0:
-               materials.remove(materials[i])
+        if self.recursive:
+            ## Find everything unreachable in one traversal and remove it in one batch
+            orphans = find_orphans()
+            freed = sum(image_data_size(id) for id in orphans if isinstance(id, bpy.types.Image))
+            if orphans:
+                bpy.data.batch_remove(orphans)
+                clear_preset_library()
+            
+            self.report({'INFO'}, "Removed %d data-blocks, freed %.2f MB of image data" % (len(orphans), freed / (1024 * 1024)))
+            return {'FINISHED'}
+        
+        ## Collect materials with users == 0 and remove them together
+        orphans = [m for m in bpy.data.materials if m.users == 0]
+        remove_materials(orphans)
                
         return {'FINISHED'}
                
@@ -203,65 +1022,71 @@ class EASEtool_OT_Remove_Material(Operator):
                 
         material = materials[index]
         
-        objects = get_objects(self.selected_only)
+        ## Only visit meshes of objects that use the material
+        users = get_material_users(material)
+        objects = [obj for obj in get_objects(self.selected_only) if obj.name in users]
         
-        # Get the number of material slots
-               
-        for obj in objects:
+        ## Slots are only popped when no object sharing the mesh holds its own material there
+        data_users = group_by_data(bpy.data.objects)
+        
+        ## Each shared mesh is processed once
+        for data, objs in group_by_data(objects).items():
             ## loop backwards to check so you can remove the slots
-            num_slots = len(obj.material_slots)
-            materials = obj.data.materials
-            for i in range(num_slots - 1, -1, -1):
-                slot = obj.material_slots[i]
-                self.remove_mat(slot, material, materials)
+            materials = data.materials
+            for i in range(len(materials) - 1, -1, -1):
+                self.remove_mat(objs, data_users.get(data, objs), material, materials, i)
+        clear_material_users()
                         
         return {'FINISHED'}
     
-    def remove_mat(self, slot, material,  materials):
-        if slot.material == material:
-            # Get the material slot index
+    def remove_mat(self, objs, data_objs, material, materials, i):
+        ## objs - objects to remove the material from, data_objs - all objects using the mesh
+        ## Object linked slots hold their material on each object
+        keep_slot = False
+        for obj in data_objs:
+            slot = obj.material_slots[i]
+            if slot.link == 'OBJECT':
+                if slot.material == material and obj in objs:
+                    slot.material = None
+                elif slot.material:
+                    keep_slot = True
+                    
+        if materials[i] == material:
             
-            if self.delete_slot:
-                # Remove the material slot from the object
-                obj_mats.pop(index=i)
+            if self.delete_slot and not keep_slot:
+                # Remove the material slot from the mesh
+                materials.pop(index=i)
             else:
-                slot.material = None
+                materials[i] = None
                
     
 class EASEtool_OT_Delete_Unused_Slots(Operator):
     """Delete unused slots from selection or all"""
     bl_idname = "easetool.delete_unused_slots"
     bl_label = "Delete Unused Slots"
+    bl_options = {'REGISTER', 'UNDO'}
     
     @classmethod
     def poll(cls, context):
-        return bpy.context.mode == 'OBJECT'
+        return context.mode == 'OBJECT'
     
     selected_only: BoolProperty( name = "Only From Selected", default = False)
-    keep_original: BoolProperty( name = "Keep Original Selection", description = "Keep original selection after removing material slots from all", default = True)
     
     def execute(self, context):
        
         objects = get_objects(self.selected_only)
         
-        if not self.selected_only:
-            sel = get_objects(True)
-            
-            ## select all i objects 
-            bpy.ops.object.select_all(action='DESELECT')
-            for obj in objects:
-                obj.select_set(True)
-                
-            bpy.ops.object.material_slot_remove_unused()
-            
-            if self.keep_original:
-                ## Select the original selection
-                bpy.ops.object.select_all(action='DESELECT')
-                for obj in sel:
-                    obj.select_set(True)
-        else:
-            bpy.ops.object.material_slot_remove_unused()
+        ## Compacting slots moves object linked slots of every object using the mesh
+        data_users = group_by_data(bpy.data.objects)
+        
+        ## Each shared mesh is cleaned once, selection is never touched
+        removed = 0
+        for data in group_by_data(objects):
+            removed += remove_unused_slots(data, data_users.get(data, []))
+        if removed:
+            clear_material_users()
         
+        self.report({'INFO'}, "Removed %d unused material slots" % removed)
                     
         return {'FINISHED'}
     
@@ -288,27 +1113,28 @@ class EASEtool_OT_Add_Material(Operator):
         index = self.index
         
         material = bpy.data.materials[index]
+        users = get_material_users(material)
         
-        ## Add material
-        for obj in objects:
-            obj_mats = obj.data.materials
+        ## Inserting in front moves object linked slots of every object using the mesh
+        data_users = group_by_data(bpy.data.objects) if not self.to_end else {}
+        
+        ## Add material once per mesh, linked duplicates share the slots
+        for data, objs in group_by_data(objects).items():
+            obj_mats = data.materials
             if self.overwrite:
                 obj_mats.clear()
-            ## Check if material is already applied to object and break loop if so
-            elif any(mat == material for mat in obj_mats): 
-                    break
-                                
-            obj_mats.append(material)
+            ## Skip meshes where every object already shows the material
+            elif all(obj.name in users for obj in objs):
+                continue
             
-            if not self.to_end:
-                ## Move the new slot to the front
-                for i in range(len(obj_mats) - 1, 0, -1):
-                    obj_mats[i] = obj_mats[i - 1]
-
-                ## Assign the material to the first slot
-                obj.data.materials[0] = material
+            if self.to_end or len(obj_mats) == 0:
+                obj_mats.append(material)
+            else:
+                ## Insert the new slot in front and shift the face indices with it
+                order = [material] + list(range(len(obj_mats)))
+                rebuild_material_slots(data, data_users.get(data, objs), order)
+        clear_material_users()
                 
-                    
         return {'FINISHED'}
 
 
@@ -336,9 +1162,10 @@ class EASEtool_OT_Assign_Fake_User(Operator):
     
 
 class EASEtool_OT_Create_Material(Operator):
-    """Create a material with selected shader"""
+    """Create materials with selected shader"""
     bl_idname = "easetool.create_material"
     bl_label = "Add material to selection or all"    
+    bl_options = {'REGISTER', 'UNDO'}
     
     random_color: BoolProperty( name = "Random Color", default = False)
     name: StringProperty( name = "Material Name", default = "Material")
@@ -348,29 +1175,65 @@ class EASEtool_OT_Create_Material(Operator):
         min = 0.0, max = 1.0)
     type: StringProperty( name = "Shader Type", default = 'ShaderNodeBsdfPrincipled')
     
+    count: IntProperty( name = "Count", default = 1, min = 1)
+    palette: EnumProperty( name = "Palette",
+        items=[("COLOR", "Color", "Color, or random colors"),
+        ("GOLDEN", "Golden Ratio", "Evenly spread hues"),
+        ("CSV", "CSV File", "Colors from a CSV file")],
+        default = "COLOR")
+    palette_path: StringProperty( name = "CSV File", default = "", subtype = 'FILE_PATH')
+    assign_selected: BoolProperty( name = "Assign To Selected", description = "Create one material per selected object and assign it", default = False)
+    
     def execute(self, context):
-        material = bpy.data.materials.new(name=self.name)
+        objects = []
+        count = self.count
+        if self.assign_selected:
+            objects = [o for o in get_objects(True) if hasattr(o.data, "materials")]
+            if not objects:
+                self.report({'WARNING'}, "No selected objects can have materials")
+                return {'CANCELLED'}
+            count = len(objects)
         
-        if self.random_color:
-            self.color = self.make_random_color()
+        colors = self.make_colors(count)
+        if colors is None:
+            return {'CANCELLED'}
         
-        material.use_nodes = True
-        tree = material.node_tree
-        nodes = tree.nodes
-        
-        nodes.clear()
-        ## Add Shader
-        shader = nodes.new(self.type)
-        shader.inputs[0].default_value = self.color
-        ## Add Output
-        output = nodes.new("ShaderNodeOutputMaterial")
-        ## Connect nodes
-        tree.links.new(shader.outputs[0], output.inputs[0])
-
-        material.diffuse_color = self.color
+        materials = new_materials(self.name, colors, self.type)
+        
+        ## One material per object, the first slot becomes an object slot when the data is shared
+        for obj, material in zip(objects, materials):
+            if not obj.material_slots:
+                obj.data.materials.append(material)
+                continue
+            slot = obj.material_slots[0]
+            if obj.data.users > 1:
+                slot.link = 'OBJECT'
+            slot.material = material
+        if objects:
+            clear_material_users()
                     
         return {'FINISHED'}
     
+    def make_colors(self, count: int) -> []:
+        if self.palette == "GOLDEN":
+            return golden_palette(count)
+        
+        if self.palette == "CSV":
+            try:
+                palette = read_palette(self.palette_path)
+            except OSError as error:
+                self.report({'ERROR'}, "Can't read palette: " + str(error))
+                return None
+            if not palette:
+                self.report({'ERROR'}, "No colors in " + self.palette_path)
+                return None
+            ## Repeat the palette when there are more materials than colors
+            return [palette[i % len(palette)] for i in range(count)]
+        
+        if self.random_color:
+            return [self.make_random_color() for _ in range(count)]
+        return [tuple(self.color)] * count
+    
     def make_random_color(self) -> ():
         h = random()  # Random hue between 0 and 1
         s = 0.8  
@@ -394,91 +1257,101 @@ class EASEtool_OT_Create_Face_Strength_Material(Operator):
         if self.name in materials:
             return {'FINISHED'}
         
-        ## Create new material
-        material = bpy.data.materials.new(name=self.name)
-        material.use_nodes = True
-        nodes = material.node_tree.nodes
-        nodes.clear()
-        
-#        tree = material.node_tree
-#        nodes = tree.nodes
-        
-        nodes.clear()
-        material.diffuse_color = (1,0,0.5,1)
-        
-        ## Create new nodes
-        attribute_node = nodes.new('ShaderNodeAttribute')
-        attribute_node.attribute_name  = '__mod_weightednormals_faceweight'
-        attribute_node.location = (0, 0)
-
-        math_node = nodes.new('ShaderNodeMath')
-        math_node.operation = 'ADD'
-        math_node.location = (200, 0)
-
-        ramp_node = nodes.new('ShaderNodeValToRGB')
-        ramp_node.color_ramp.interpolation = 'CONSTANT'
-        ramp_node.color_ramp.elements[0].position = 0
-        ramp_node.color_ramp.elements[0].color = (0.1, 0.136, 1, 1)
-        ramp_node.color_ramp.elements[1].position = 0.33
-        ramp_node.color_ramp.elements[1].color = (0.118, 1, 0.1, 1)
-        ramp_node.color_ramp.elements.new(0.66)
-        ramp_node.color_ramp.elements[2].color = (1, 0.1, 0.1, 1)
-        ramp_node.location = (400, 0)
-
-        emission_node = nodes.new('ShaderNodeEmission')
-        emission_node.inputs[0].default_value = (1,0,0.5,1)
-        emission_node.location = (700, 0)
-
-        output_node = nodes.new('ShaderNodeOutputMaterial')
-        output_node.location = (900, 0)
-
-        # Link the nodes
-        links = material.node_tree.links
-        links.new(attribute_node.outputs['Fac'], math_node.inputs[0])
-        links.new(math_node.outputs['Value'], ramp_node.inputs['Fac'])
-        links.new(ramp_node.outputs['Color'], emission_node.inputs['Color'])
-        links.new(emission_node.outputs['Emission'], output_node.inputs['Surface'])
+        instance_preset("face_strength", self.name)
              
         return {'FINISHED'}
     
     
-#class EASEtool_OT_Create_Ngon_Material(Operator):
-#    """Create and asign materials based on nr of vertices per face and add to selected objects"""
-#    bl_idname = "easetool.create_ngon_material"
-#    bl_label = "Create a Materials To Show Ngons, Quads and Tris"
-#    
-#    @classmethod
-#    def poll(cls, context):
-#        # Check if there are any materials in the blend file
-#        return bpy.context.object.type == 'MESH'
-#        
-#    ngon_name: StringProperty( name = "Ngon material Name", default = "[NGON INDICATOR]")
-#    quad_name: StringProperty( name = "Quad material Name", default = "[QUAD INDICATOR]")
-#    tris_name: StringProperty( name = "Tris material Name", default = "[TRIS INDICATOR]")
-#    
-#    def execute(self, context):
-#        mesh = obj.data
-
-#        ## Check if materials already exists
-#        materials = bpy.data.materials
-#        ## Check if material exists in object
-#
-#        quads = []
-#        ngons = []
-#        tris = []
-#        
-#        ## Get ngons quads tris
-#        for polygon in mesh.polygons:
-#            if len(polygon.vertices) == 4:
-#                quads.append(polygon)
-#            elif len(polygon.vertices) < 4:
-#                tris.append(polygon)
-#            elif len(polygon.vertices) > 4:
-#                ngons.append(polygon)
-#        
-#        ## Assign
-
-#        return {'FINISHED'}
+class EASEtool_OT_Create_Ngon_Material(Operator):
+    """Create and asign materials based on nr of vertices per face and add to selected objects"""
+    bl_idname = "easetool.create_ngon_material"
+    bl_label = "Create a Materials To Show Ngons, Quads and Tris"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    @classmethod
+    def poll(cls, context):
+        ## Face indices are written on mesh data, which is out of date in edit mode
+        return context.mode == 'OBJECT' and any(obj.type == 'MESH' for obj in context.selected_objects)
+        
+    ngon_name: StringProperty( name = "Ngon material Name", default = "[NGON INDICATOR]")
+    quad_name: StringProperty( name = "Quad material Name", default = "[QUAD INDICATOR]")
+    tris_name: StringProperty( name = "Tris material Name", default = "[TRIS INDICATOR]")
+    
+    def execute(self, context):
+        ## Create or reuse the indicator materials, order matches the face classes below
+        indicators = [self.get_material(self.tris_name, "tris"),
+                      self.get_material(self.quad_name, "quads"),
+                      self.get_material(self.ngon_name, "ngons")]
+        
+        counts = np.zeros(3, dtype=np.int64)
+        meshes = group_by_data(obj for obj in context.selected_objects if obj.type == 'MESH')
+        for mesh in meshes:
+            polygons = mesh.polygons
+            loop_total = np.empty(len(polygons), dtype=np.int32)
+            polygons.foreach_get("loop_total", loop_total)
+            
+            ## 0 - tris, 1 - quads, 2 - ngons
+            classes = np.clip(loop_total - 3, 0, 2)
+            counts += np.bincount(classes, minlength=3)
+            
+            ## Find or add the slots and write all face indices at once
+            slots = np.array([self.get_slot(mesh, m) for m in indicators], dtype=np.int32)
+            polygons.foreach_set("material_index", slots[classes])
+            mesh.update()
+        clear_material_users()
+        
+        self.report({'INFO'}, "Tris: %d, Quads: %d, Ngons: %d" % tuple(counts))
+
+        return {'FINISHED'}
+    
+    def get_material(self, name: str, preset: str):
+        ## Reuse the indicator if it already exists
+        material = bpy.data.materials.get(name)
+        if material is None:
+            material = instance_preset(preset, name)
+            
+        return material
+    
+    def get_slot(self, mesh, material) -> int:
+        ## Index of the slot holding material, appended if the mesh doesn't have it
+        materials = mesh.materials
+        for i, m in enumerate(materials):
+            if m == material:
+                return i
+        materials.append(material)
+        
+        return len(materials) - 1
+
+
+class EASEtool_OT_Upgrade_Presets(Operator):
+    """Replace materials made from an older version of a preset with a new copy"""
+    bl_idname = "easetool.upgrade_presets"
+    bl_label = "Upgrade Preset Materials"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        stale = stale_presets()
+        
+        copies = []
+        for old in stale:
+            preset = old["easetool_preset"]
+            new = instance_preset(preset, old.name)
+            if preset.startswith("id_color "):
+                set_shader_color(new, tuple(old.diffuse_color))
+            new.use_fake_user = old.use_fake_user
+            ## Slots, node links and everything else using the old material move to the new one
+            old.user_remap(new)
+            copies.append((old.name, new))
+        remove_materials(stale)
+        
+        ## Copies got suffixed names while the old materials existed
+        for name, new in copies:
+            new.name = name
+        clear_material_users()
+        
+        self.report({'INFO'}, "Upgraded %d preset materials" % len(copies))
+                      
+        return {'FINISHED'}
 
 
 class EASEtool_OT_Colorize_Materials(Operator):
@@ -492,39 +1365,12 @@ class EASEtool_OT_Colorize_Materials(Operator):
         ## Check if there are any materials in the blend file
         return any_materials()
     
+    force: BoolProperty( name = "Force", description = "Resolve all materials again, not only the changed ones", default = False)
+    
     def execute(self, context):
-        materials = bpy.data.materials
+        changed = colorize_materials(bpy.data.materials, self.force)
         
-        for m in materials:
-
-            ## Get the material output node
-            material_output = m.node_tree.nodes.get('Material Output')
-
-            ## if material output doesn't exist ignore
-            if not material_output:
-                continue           
-        
-            ## Get the input shader of the material output node
-            input_shader = material_output.inputs['Surface'].links[0].from_node
-            
-            ## Check if the input shader exists
-            if not input_shader:
-                continue
-            
-            color = ()
-            ## Check if the node is Add or Mix nodes
-            if input_shader.type == 'ShaderNodeMixShader':
-                color = (0.583, 0.922, 0.227, 1)
-            elif input_shader.type == 'ShaderNodeAddShader':
-                color = (0.333, 0.814, 0.130, 1)
-            else: 
-                ## Get the color from the input shader
-                ## Most if not all Shaders have color node at index 0
-                color = input_shader.inputs[0].default_value
-            
-            m.diffuse_color = color
-
-
+        self.report({'INFO'}, "Colorized %d materials" % changed)
 
         return {'FINISHED'}
 
@@ -573,6 +1419,10 @@ class EASEtool_PT_Material_Panel(Panel):
         op.color = props.new_color
         op.random_color = props.random_color
         op.type = props.new_shader
+        op.count = props.new_count
+        op.palette = props.new_palette
+        op.palette_path = props.palette_path
+        op.assign_selected = props.assign_selected
         
         ## Get Name
         row = c.split(factor=0.2, align=True)
@@ -591,11 +1441,25 @@ class EASEtool_PT_Material_Panel(Panel):
         row.label(text="Shader:")
         row.prop(props, "new_shader", text="")
         
+        ## Batch
+        row = c.split(factor=0.2, align=True)
+        row.label(text="Palette:")
+        row.prop(props, "new_palette", text="")
+        if props.new_palette == "CSV":
+            c.prop(props, "palette_path", text="")
+        row = c.row(align=True)
+        r = row.row(align=True)
+        r.active = not props.assign_selected
+        r.prop(props, "new_count")
+        row.prop(props, "assign_selected", text="", icon="RESTRICT_SELECT_OFF")
+        
         
         ## Colorize Materials
         col.separator()
         box = col.box()
-        box.operator("easetool.colorize")
+        row = box.row(align=True)
+        row.operator("easetool.colorize")
+        row.prop(props, "auto_colorize", text="", icon="AUTO")
         
                 
         ## Object Section
@@ -636,7 +1500,8 @@ class EASEtool_PT_Material_Panel(Panel):
         op.index = index
         op.selected_only = True
         op.delete_slot = props.delete_slot
-        c.operator("easetool.remove_material", text="Remove Material From All")
+        op = c.operator("easetool.remove_material", text="Remove Material From All")
+        op.index = index
         op.selected_only = False
         op.delete_slot = props.delete_slot
 
@@ -648,12 +1513,7 @@ class EASEtool_PT_Material_Panel(Panel):
         c.separator()
         c.operator("easetool.delete_unused_slots", text="Delete Unused Slots From Selected").selected_only = True
         
-        row = c.row(align=True, translate=False)
-        row.active = context.mode == 'OBJECT'
-        op = row.operator("easetool.delete_unused_slots", text="Delete All Unused Slots")
-        op.selected_only = False
-        op.keep_original = props.keep_original
-        row.prop(props, "keep_original", text = "", icon = "RESTRICT_SELECT_OFF")
+        c.operator("easetool.delete_unused_slots", text="Delete All Unused Slots").selected_only = False
                 
         ## Remove Material from File
         col.separator()
@@ -664,7 +1524,9 @@ class EASEtool_PT_Material_Panel(Panel):
         op = c.operator("easetool.delete_materials", text="Delete Selected Material", icon="FILE_BACKUP")
         op.index = index
         op.delete_all = False ## Crahses sometimes Index issue
-        c.operator("easetool.delete_unused_materials", text="Delete All Orphan Materials", icon="ORPHAN_DATA")
+        row = c.row(align=True, translate=False)
+        row.operator("easetool.delete_unused_materials", text="Delete All Orphan Materials", icon="ORPHAN_DATA").recursive = props.purge_recursive
+        row.prop(props, "purge_recursive", text = "", icon = "OUTLINER")
         c.operator("easetool.delete_materials", text="Delete All Materials", icon="TRASH").delete_all = True 
         
                 
@@ -675,6 +1537,8 @@ class EASEtool_PT_Material_Panel(Panel):
         c = box.column(align=True)
         
         c.operator("easetool.create_face_strength_material", text="Face Strength indicator Material", icon="MOD_NORMALEDIT")
+        c.operator("easetool.create_ngon_material", text="Ngon indicator Materials", icon="MESH_DATA")
+        c.operator("easetool.upgrade_presets", icon="FILE_REFRESH")
         
 
 #############################################################
@@ -684,7 +1548,8 @@ class EASEtool_PT_Material_Panel(Panel):
 classes = [ EASEtool_UL_Material_List, EASEtool_PT_Material_Panel, EASEtool_Material_Property_Group,
             EASEtool_OT_Delete_Materials, EASEtool_OT_Delete_Unused_Materials, EASEtool_OT_Remove_Material,
             EASEtool_OT_Delete_Unused_Slots, EASEtool_OT_Add_Material, EASEtool_OT_Assign_Fake_User, 
-            EASEtool_OT_Create_Material, EASEtool_OT_Create_Face_Strength_Material, EASEtool_OT_Colorize_Materials
+            EASEtool_OT_Create_Material, EASEtool_OT_Create_Face_Strength_Material, EASEtool_OT_Create_Ngon_Material,
+            EASEtool_OT_Upgrade_Presets, EASEtool_OT_Colorize_Materials
             ]
 
 from bpy.utils import register_class, unregister_class
@@ -694,11 +1559,37 @@ def register():
         register_class(c)
         
     bpy.types.Scene.ease_mat_prop_grp = PointerProperty(type=EASEtool_Material_Property_Group)
+    
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_material_users)
+    bpy.app.handlers.load_post.append(clear_material_users)
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_material_colors)
+    bpy.app.handlers.load_post.append(clear_material_colors)
+    bpy.app.handlers.load_post.append(restore_auto_colorize)
+    bpy.app.handlers.load_post.append(clear_preset_library)
+    bpy.app.handlers.undo_post.append(clear_preset_library)
+    bpy.app.handlers.redo_post.append(clear_preset_library)
 
 def unregister():
     for c in classes:
         unregister_class(c)
         
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_material_users)
+    bpy.app.handlers.load_post.remove(clear_material_users)
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_material_colors)
+    bpy.app.handlers.load_post.remove(clear_material_colors)
+    bpy.app.handlers.load_post.remove(restore_auto_colorize)
+    bpy.app.handlers.load_post.remove(clear_preset_library)
+    bpy.app.handlers.undo_post.remove(clear_preset_library)
+    bpy.app.handlers.redo_post.remove(clear_preset_library)
+    preset_library.clear()
+    
+    ## Stop auto colorize
+    bpy.msgbus.clear_by_owner(auto_colorize_owner)
+    if auto_colorize_update in bpy.app.handlers.depsgraph_update_post:
+        bpy.app.handlers.depsgraph_update_post.remove(auto_colorize_update)
+    if bpy.app.timers.is_registered(flush_auto_colorize):
+        bpy.app.timers.unregister(flush_auto_colorize)
+        
     del bpy.types.Scene.ease_mat_prop_grp
 
 if __name__ == "__main__":
@@ -11,9 +11,317 @@ bl_info = {
 }
 
 
-import bpy
+import bpy, bmesh
+import numpy as np
+from bpy.app.handlers import persistent
 from bpy.types import Menu, Operator
-from bpy.props import EnumProperty, FloatProperty, StringProperty, BoolProperty, FloatVectorProperty
+from bpy.props import EnumProperty, FloatProperty, IntProperty, StringProperty, BoolProperty, FloatVectorProperty
+
+#######################################################################################################################
+##### FUNCTIONS #####
+#######################################################################################################################
+
+## Face attribute written by mesh.mod_weighted_strength and read by the Weighted Normal modifier
+FACE_STRENGTH_LAYER = "__mod_weightednormals_faceweight"
+FACE_STRENGTH_VALUES = {"WEAK": -16384, "MEDIUM": 0, "STRONG": 16384}
+
+def selected_faces(obj) -> np.ndarray:
+    """
+    indices of selected faces of an object in edit mode
+    the edit mesh is written to mesh data first so the selection can be read in one call
+    """
+    obj.update_from_editmode()
+    polygons = obj.data.polygons
+    select = np.empty(len(polygons), dtype=bool)
+    polygons.foreach_get("select", select)
+    
+    return np.flatnonzero(select)
+
+def set_face_strength(obj, strength: int, smooth: bool):
+    """
+    write face strength to the selected faces of an object in edit mode
+    smooth - also shade the selected faces smooth
+    """
+    indices = selected_faces(obj)
+    if len(indices) == 0:
+        return
+    
+    mesh = obj.data
+    bm = bmesh.from_edit_mesh(mesh)
+    layer = bm.faces.layers.int.get(FACE_STRENGTH_LAYER) or bm.faces.layers.int.new(FACE_STRENGTH_LAYER)
+    faces = bm.faces
+    faces.ensure_lookup_table()
+    
+    ## Only the selected faces are touched
+    for i in indices.tolist():
+        face = faces[i]
+        face[layer] = strength
+        if smooth:
+            face.smooth = True
+    
+    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+def read_array(collection, attribute: str, dtype, width: int = 1) -> np.ndarray:
+    """
+    read a property of every item of a mesh collection into an array
+    width - nr of values per item, eg. 3 for coordinates
+    """
+    values = np.empty(len(collection) * width, dtype=dtype)
+    collection.foreach_get(attribute, values)
+    
+    return values.reshape(-1, width) if width > 1 else values
+
+def read_face_strength(mesh) -> np.ndarray:
+    """
+    face strength of every face, medium where the attribute doesn't exist
+    """
+    attribute = mesh.attributes.get(FACE_STRENGTH_LAYER)
+    if attribute is None or attribute.domain != 'FACE':
+        return np.zeros(len(mesh.polygons), dtype=np.int32)
+    
+    return read_array(attribute.data, "value", np.int32)
+
+def face_geometry(co, loop_vert, loop_start, loop_total, faces):
+    """
+    normal, area and corner angles of some faces, vectorized over their corners
+    faces - face indices
+    returns corners of the faces, face normals, face areas, corner angles
+    """
+    totals = loop_total[faces]
+    seg_end = np.cumsum(totals)
+    seg_start = seg_end - totals
+    local = np.arange(seg_end[-1] if len(faces) else 0)
+    corners = np.repeat(loop_start[faces] - seg_start, totals) + local
+    
+    ## Next and previous corner in the same face
+    nxt = local + 1
+    nxt[seg_end - 1] = seg_start
+    prv = local - 1
+    prv[seg_start] = seg_end - 1
+    
+    p = co[loop_vert[corners]]
+    if len(faces) == 0:
+        return corners, np.zeros((0, 3)), np.zeros(0), np.zeros(0)
+    
+    ## Newell's method, works for ngons too
+    newell = np.add.reduceat(np.cross(p, p[nxt]), seg_start, axis=0)
+    length = np.linalg.norm(newell, axis=1)
+    normals = newell / np.maximum(length, 1e-12)[:, None]
+    
+    a = p[prv] - p
+    b = p[nxt] - p
+    angles = np.arctan2(np.linalg.norm(np.cross(a, b), axis=1), np.einsum("ij,ij->i", a, b))
+    
+    return corners, normals, 0.5 * length, angles
+
+def sum_weighted_normals(cache, corners, params, num_verts) -> np.ndarray:
+    """
+    sum face normals around vertices the way the Weighted Normal modifier weights them
+    corners - corners taking part, every corner of the vertices being computed
+    """
+    mode, weight, thresh, face_influence = params
+    vert = cache["loop_vert"][corners]
+    face = cache["corner_face"][corners]
+    
+    if mode == 'FACE_AREA':
+        value = cache["face_area"][face]
+    elif mode == 'CORNER_ANGLE':
+        value = cache["corner_angle"][corners]
+    else:
+        value = cache["face_area"][face] * cache["corner_angle"][corners]
+    
+    ## Only the strongest faces around a vertex count
+    if face_influence:
+        strength = cache["strength"][face]
+        strongest = np.full(num_verts, np.iinfo(np.int32).min, dtype=np.int32)
+        np.maximum.at(strongest, vert, strength)
+        keep = strength == strongest[vert]
+        vert, face, value = vert[keep], face[keep], value[keep]
+    
+    ## Every step down in value around a vertex divides the weight again
+    if weight != 50 and len(vert):
+        order = np.lexsort((-value, vert))
+        vert, face, value = vert[order], face[order], value[order]
+        same_vert = vert[1:] == vert[:-1]
+        step = np.zeros(len(vert), dtype=np.int64)
+        step[1:] = same_vert & (np.abs(value[1:] - value[:-1]) > thresh)
+        rank = np.cumsum(step)
+        first = np.flatnonzero(np.concatenate(([True], ~same_vert)))
+        rank -= np.repeat(rank[first], np.diff(np.append(first, len(vert))))
+        if weight == 100:
+            value = np.where(rank == 0, value, 0.0)
+        else:
+            value = value * (weight / 50) ** -rank.astype(np.float64)
+    
+    weighted = cache["face_normal"][face] * value[:, None]
+    sums = np.empty((num_verts, 3))
+    for axis in range(3):
+        sums[:, axis] = np.bincount(vert, weights=weighted[:, axis], minlength=num_verts)
+        
+    return sums
+
+## Mesh name -> arrays of the last weighted normal computation
+weighted_normal_cache = {}
+
+def weighted_normals(mesh, mode: str = 'FACE_AREA', weight: int = 50, thresh: float = 0.01, face_influence: bool = True) -> np.ndarray:
+    """
+    compute weighted custom normals of a mesh in object mode, returns a normal per loop
+    approximates the Weighted Normal modifier, values are compared to the previous value around a vertex for thresh
+    and sharp edges are not kept
+    results are cached per mesh, only faces whose vertices moved or strength changed are recomputed
+    """
+    params = (mode, weight, thresh, face_influence)
+    co = read_array(mesh.vertices, "co", np.float64, 3)
+    loop_vert = read_array(mesh.loops, "vertex_index", np.int32)
+    loop_start = read_array(mesh.polygons, "loop_start", np.int32)
+    loop_total = read_array(mesh.polygons, "loop_total", np.int32)
+    strength = read_face_strength(mesh)
+    num_verts = len(co)
+    
+    cache = weighted_normal_cache.get(mesh.name)
+    same_topology = (cache is not None and len(cache["co"]) == num_verts
+                     and np.array_equal(cache["loop_vert"], loop_vert) and np.array_equal(cache["loop_total"], loop_total))
+    
+    if not same_topology:
+        ## Full computation
+        faces = np.arange(len(loop_start))
+        corners, normals, areas, angles = face_geometry(co, loop_vert, loop_start, loop_total, faces)
+        cache = {"co": co, "strength": strength, "loop_vert": loop_vert, "loop_start": loop_start, "loop_total": loop_total,
+                 "corner_face": np.repeat(faces, loop_total), "face_normal": normals, "face_area": areas,
+                 "corner_angle": angles, "params": None}
+        weighted_normal_cache[mesh.name] = cache
+        affected = None
+    else:
+        ## Faces touching a moved vertex or with a new strength
+        moved = np.any(co != cache["co"], axis=1)
+        dirty = strength != cache["strength"]
+        if len(loop_start):
+            dirty |= np.logical_or.reduceat(moved[loop_vert], loop_start)
+        faces = np.flatnonzero(dirty)
+        
+        if len(faces) == 0 and cache["params"] == params:
+            return cache["loop_normals"]
+        
+        if len(faces):
+            corners, normals, areas, angles = face_geometry(co, loop_vert, loop_start, loop_total, faces)
+            cache["face_normal"][faces] = normals
+            cache["face_area"][faces] = areas
+            cache["corner_angle"][corners] = angles
+            cache["co"] = co
+            cache["strength"] = strength
+        
+        ## New settings change every vertex, new geometry only the vertices of dirty faces
+        if cache["params"] == params:
+            affected = np.zeros(num_verts, dtype=bool)
+            affected[loop_vert[corners]] = True
+        else:
+            affected = None
+    
+    if affected is None:
+        corners = np.arange(len(loop_vert))
+    else:
+        corners = np.flatnonzero(affected[loop_vert])
+        
+    sums = sum_weighted_normals(cache, corners, params, num_verts)
+    length = np.linalg.norm(sums, axis=1)
+    vertex_normals = sums / np.maximum(length, 1e-12)[:, None]
+    
+    if affected is None:
+        cache["vertex_normal"] = vertex_normals
+        cache["loop_normals"] = vertex_normals[loop_vert].astype(np.float32)
+    else:
+        cache["vertex_normal"][affected] = vertex_normals[affected]
+        cache["loop_normals"][corners] = vertex_normals[loop_vert[corners]]
+    cache["params"] = params
+        
+    return cache["loop_normals"]
+
+def set_shade_smooth(objects, smooth: bool) -> int:
+    """
+    set smooth or flat shading of objects through their data, without selection or operators
+    shared meshes are written once, data in edit mode is skipped
+    returns nr of changed data blocks
+    """
+    done = set()
+    for obj in objects:
+        data = obj.data
+        if data is None or data in done or getattr(data, "is_editmode", False):
+            continue
+        
+        if isinstance(data, bpy.types.Mesh):
+            data.polygons.foreach_set("use_smooth", np.full(len(data.polygons), smooth, dtype=bool))
+            data.update()
+        elif isinstance(data, bpy.types.Curve) and not isinstance(data, bpy.types.TextCurve):
+            data.splines.foreach_set("use_smooth", np.full(len(data.splines), smooth, dtype=bool))
+            data.update_tag()
+        else:
+            continue
+        done.add(data)
+        
+    return len(done)
+
+## Mesh name -> dihedral angles of all edges, sorted once
+edge_angle_cache = {}
+
+def edge_angles(mesh) -> {}:
+    """
+    table of the dihedral angle of every edge, sorted so any angle threshold is a binary search
+    cached per mesh and rebuilt only when topology or vertex positions change
+    boundary edges never count as sharp, edges with more than two faces always do
+    """
+    co = read_array(mesh.vertices, "co", np.float64, 3)
+    edge_verts = read_array(mesh.edges, "vertices", np.int32, 2)
+    loop_edge = read_array(mesh.loops, "edge_index", np.int32)
+    
+    cache = edge_angle_cache.get(mesh.name)
+    if (cache is not None and np.array_equal(cache["co"], co)
+            and np.array_equal(cache["edge_verts"], edge_verts) and np.array_equal(cache["loop_edge"], loop_edge)):
+        return cache
+    
+    loop_vert = read_array(mesh.loops, "vertex_index", np.int32)
+    loop_start = read_array(mesh.polygons, "loop_start", np.int32)
+    loop_total = read_array(mesh.polygons, "loop_total", np.int32)
+    faces = np.arange(len(loop_start))
+    normals = face_geometry(co, loop_vert, loop_start, loop_total, faces)[1]
+    corner_face = np.repeat(faces, loop_total)
+    
+    ## Faces around every edge, corners grouped by edge
+    num_edges = len(edge_verts)
+    count = np.bincount(loop_edge, minlength=num_edges)
+    order = np.argsort(loop_edge, kind="stable")
+    first = np.concatenate(([0], np.cumsum(count)[:-1]))
+    
+    angles = np.zeros(num_edges)
+    angles[count > 2] = np.pi
+    manifold = np.flatnonzero(count == 2)
+    f0 = corner_face[order[first[manifold]]]
+    f1 = corner_face[order[first[manifold] + 1]]
+    dot = np.einsum("ij,ij->i", normals[f0], normals[f1])
+    angles[manifold] = np.arccos(np.clip(dot, -1.0, 1.0))
+    
+    sorted_edges = np.argsort(angles)
+    cache = {"co": co, "edge_verts": edge_verts, "loop_edge": loop_edge,
+             "sorted_edges": sorted_edges, "sorted_angles": angles[sorted_edges]}
+    edge_angle_cache[mesh.name] = cache
+    
+    return cache
+
+@persistent
+def clear_normal_caches(*args):
+    """Drop the cached arrays after loading a file, mesh names can belong to other meshes there"""
+    weighted_normal_cache.clear()
+    edge_angle_cache.clear()
+
+def sharp_edge_mask(mesh, angle: float) -> np.ndarray:
+    """
+    edges sharper than angle, in radians
+    """
+    table = edge_angles(mesh)
+    start = np.searchsorted(table["sorted_angles"], angle, side="right")
+    mask = np.zeros(len(table["sorted_edges"]), dtype=bool)
+    mask[table["sorted_edges"][start:]] = True
+    
+    return mask
 
 #######################################################################################################################
 ##### OPERATORS #####
@@ -58,24 +366,38 @@ class EASEtool_OT_Set_Face_Strength(EASEtool_OT_Face_Strength):
     
     def execute(self, context):
         self.set = True
-        super().execute(context)
-        self.weighted_normal_setup(context)
+        strength = FACE_STRENGTH_VALUES[self.face_strength]
+        
+        ## Every object in multi object edit mode, one undo step
+        objects = [obj for obj in context.objects_in_mode if obj.type == 'MESH']
+        new_setup = self.weighted_normal_setup(objects)
+        
+        ## Shared meshes are written once
+        for obj in context.objects_in_mode_unique_data:
+            if obj.type == 'MESH':
+                set_face_strength(obj, strength, smooth = obj.data in new_setup)
 
         return {'FINISHED'}
     
-    def weighted_normal_setup(self, context):
-        # find or create weighted normal
-        obj = context.active_object
-        for mod in obj.modifiers:
-            if mod.type == 'WEIGHTED_NORMAL':
-                return
-        else:
+    def weighted_normal_setup(self, objects: []) -> set:
+        """
+        add a weighted normal modifier to objects that have none
+        returns meshes of the new modifiers, they get auto smooth and smooth shading
+        """
+        meshes = set()
+        for obj in objects:
+            # find or create weighted normal
+            if any(mod.type == 'WEIGHTED_NORMAL' for mod in obj.modifiers):
+                continue
             mod = obj.modifiers.new("Weighted Normals", 'WEIGHTED_NORMAL')
-        mod.use_face_influence = True
-        bpy.ops.mesh.faces_shade_smooth()
-        obj.data.use_auto_smooth = True
-        obj.data.auto_smooth_angle = 1.0472
-        return
+            mod.use_face_influence = True
+            meshes.add(obj.data)
+            
+        for mesh in meshes:
+            mesh.use_auto_smooth = True
+            mesh.auto_smooth_angle = 1.0472
+            
+        return meshes
 
 class EASEtool_OT_Toggle_Auto_Smooth(Operator):
     """Toggle Auto Smooth"""
@@ -110,23 +432,101 @@ class EASEtool_OT_Set_Auto_Smooth_Angle(Operator):
 
         return {'FINISHED'}
     
+class EASEtool_OT_Sharp_By_Angle(Operator):
+    """Mark or select edges sharper than the angle, from a cached table of edge angles"""
+    bl_idname = "easetool.sharp_by_angle"
+    bl_label = "Sharp by Angle"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    angle: FloatProperty(name="Angle", subtype='ANGLE', default=0.523599, min=0, max=3.141592653589793)
+    action: EnumProperty(name="Action",
+        items=[("MARK", "Mark Sharp", "Mark edges sharper than the angle as sharp, clear the rest"),
+               ("SELECT", "Select", "Select edges sharper than the angle, edit mode only")],
+    )
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode in {'OBJECT', 'EDIT_MESH'}
+    
+    def execute(self, context):
+        if context.mode == 'EDIT_MESH':
+            objects = [obj for obj in context.objects_in_mode_unique_data if obj.type == 'MESH']
+        elif self.action == "SELECT":
+            self.report({'WARNING'}, "Selecting edges needs edit mode")
+            return {'CANCELLED'}
+        else:
+            ## Shared meshes once
+            objects = list({obj.data: obj for obj in context.selected_objects if obj.type == 'MESH'}.values())
+        
+        for obj in objects:
+            mesh = obj.data
+            if obj.mode == 'EDIT':
+                obj.update_from_editmode()
+            sharp = sharp_edge_mask(mesh, self.angle)
+            
+            if obj.mode == 'EDIT':
+                self.set_edit_edges(obj, sharp)
+            else:
+                mesh.edges.foreach_set("use_edge_sharp", sharp)
+                mesh.update()
+            
+        return {'FINISHED'}
+    
+    def set_edit_edges(self, obj, sharp):
+        ## Only touch edges whose state changes
+        mesh = obj.data
+        attribute = "select" if self.action == "SELECT" else "use_edge_sharp"
+        current = read_array(mesh.edges, attribute, bool)
+        changed = np.flatnonzero(current != sharp)
+        if len(changed) == 0:
+            return
+        
+        bm = bmesh.from_edit_mesh(mesh)
+        edges = bm.edges
+        edges.ensure_lookup_table()
+        
+        if self.action == "SELECT":
+            for i in changed.tolist():
+                edges[i].select_set(bool(sharp[i]))
+            bm.select_flush_mode()
+        else:
+            for i in changed.tolist():
+                edges[i].smooth = not sharp[i]
+                
+        bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+
 class EASEtool_OT_Set_Shade_Mode(Operator):
     """Set Shade Mode or Edge Shading"""
     bl_idname = "easetool.set_shade_mode"
     bl_label = "Set Shade Mode"
     
+    bl_options = {'REGISTER', 'UNDO'}
+    
     mode: EnumProperty(
         items=[("SMOOTH", "Smooth", "Shade Smooth"),
                ("FLAT", "Flat", "Shade Flat")],
         name="Shading Mode"
     )
+    target: EnumProperty(
+        items=[("SELECTED", "Selected", "Selected objects"),
+               ("COLLECTION", "Collection", "All objects in a collection")],
+        name="Target", description="Objects to shade in object mode"
+    )
+    collection: StringProperty(name="Collection", description="Name of the collection for the Collection target")
 
     def execute(self, context): 
-        if bpy.context.mode == "OBJECT":
-            if self.mode == "SMOOTH":
-                bpy.ops.object.shade_smooth()
+        if context.mode == "OBJECT":
+            ## Data level, no selection needed, works from the command line
+            if self.target == "COLLECTION":
+                collection = bpy.data.collections.get(self.collection)
+                if collection is None:
+                    self.report({'WARNING'}, "Collection not found: " + self.collection)
+                    return {'CANCELLED'}
+                objects = collection.all_objects
             else:
-                bpy.ops.object.shade_flat()
+                objects = context.selected_objects
+            set_shade_smooth(objects, self.mode == "SMOOTH")
         elif bpy.context.mode == "EDIT_MESH":
             if self.mode == "SMOOTH":
                 bpy.ops.mesh.faces_shade_smooth()
@@ -160,6 +560,37 @@ class EASEtool_OT_Add_Weighted_Normal(Operator):
         return {'FINISHED'}
 
 
+class EASEtool_OT_Weighted_Normal_Preview(Operator):
+    """Set custom normals weighted by face area or corner angle, without a modifier"""
+    bl_idname = "easetool.weighted_normal_preview"
+    bl_label = "Weighted Normals (Direct)"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    mode: EnumProperty(name="Weighting Mode",
+        items=[("FACE_AREA", "Face Area", "Weight by face area"),
+               ("CORNER_ANGLE", "Corner Angle", "Weight by corner angle"),
+               ("FACE_AREA_WITH_ANGLE", "Face Area and Angle", "Weight by face area and corner angle")],
+    )
+    weight: IntProperty(name="Weight", description="Higher values give more influence to larger faces, 50 weights them linearly", default=50, min=1, max=100)
+    thresh: FloatProperty(name="Threshold", description="Values closer than this are weighted the same", default=0.01, min=0, max=10)
+    face_influence: BoolProperty(name="Face Influence", description="Use face strength, only the strongest faces around a vertex count", default=True)
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'OBJECT' and any(obj.type == 'MESH' for obj in context.selected_objects)
+    
+    def execute(self, context):
+        ## Shared meshes once
+        meshes = {obj.data for obj in context.selected_objects if obj.type == 'MESH'}
+        for mesh in meshes:
+            normals = weighted_normals(mesh, self.mode, self.weight, self.thresh, self.face_influence)
+            ## Custom normals need auto smooth
+            mesh.use_auto_smooth = True
+            mesh.normals_split_custom_set(normals)
+            
+        return {'FINISHED'}
+
+
 class EASEtool_OT_Call_Normal_Pie(Operator):
     """Call pie menu. For keymaps"""
     bl_idname = "easetool.call_normal_pie"
@@ -280,6 +711,13 @@ class EASEtool_Normal_Pie_Menu(Menu):
 
         row.prop(active_data, "auto_smooth_angle")
         
+        row = c.row(align=True)
+        row.operator("easetool.sharp_by_angle", text="Mark Sharp by Angle").angle = active_data.auto_smooth_angle
+        if active.mode == "EDIT":
+            op = row.operator("easetool.sharp_by_angle", text="Select by Angle")
+            op.angle = active_data.auto_smooth_angle
+            op.action = "SELECT"
+        
         overlay = context.space_data.overlay # Error if run in Text Editor
         # Normal Vectors
         if active.mode == "EDIT":
@@ -333,7 +771,6 @@ class EASEtool_Normal_Pie_Menu(Menu):
         wn_mods = []
         # List Weighted Normal Modifiers on Object
         for mod in active.modifiers:
-            print(mod)
             if mod.type == 'WEIGHTED_NORMAL':
                 wn_mods.append(mod)  
                 
@@ -368,6 +805,9 @@ class EASEtool_Normal_Pie_Menu(Menu):
             
             col.operator("easetool.add_weighted_normal", text="Weighted Normal Modifier", icon="MOD_NORMALEDIT").keep_sharp = False
             col.operator("easetool.add_weighted_normal", text="Weighted Normal Modifier (Sharp)", icon="MOD_NORMALEDIT").keep_sharp = True
+            
+        col.separator()
+        col.operator("easetool.weighted_normal_preview", icon="NORMALS_VERTEX_FACE")
         
         # Face Strengths
     
@@ -397,14 +837,17 @@ class EASEtool_Normal_Pie_Menu(Menu):
 
 classes = [ EASEtool_Normal_Pie_Menu, EASEtool_OT_Call_Normal_Pie,
             EASEtool_OT_Face_Strength, EASEtool_OT_Select_Face_Strength, EASEtool_OT_Set_Face_Strength,
-            EASEtool_OT_Toggle_Auto_Smooth, EASEtool_OT_Set_Auto_Smooth_Angle, EASEtool_OT_Set_Shade_Mode,
-            EASEtool_OT_Add_Weighted_Normal,
+            EASEtool_OT_Toggle_Auto_Smooth, EASEtool_OT_Set_Auto_Smooth_Angle, EASEtool_OT_Sharp_By_Angle, EASEtool_OT_Set_Shade_Mode,
+            EASEtool_OT_Add_Weighted_Normal, EASEtool_OT_Weighted_Normal_Preview,
             ]
 addon_keymaps = []
 
 
 def register_keymaps():
     wm = bpy.context.window_manager
+    ## No addon keyconfig in background mode
+    if wm.keyconfigs.addon is None:
+        return
 
     km = wm.keyconfigs.addon.keymaps.new(name='3D View', space_type='VIEW_3D')
     kmi = km.keymap_items.new('easetool.call_normal_pie', 'N', 'PRESS', alt=True)
@@ -422,12 +865,16 @@ def register():
         bpy.utils.register_class(c)
 
     register_keymaps()
+    bpy.app.handlers.load_post.append(clear_normal_caches)
 
 def unregister():
     for c in classes:
         bpy.utils.unregister_class(c)
 
     unregister_keymaps()
+    if clear_normal_caches in bpy.app.handlers.load_post:
+        bpy.app.handlers.load_post.remove(clear_normal_caches)
+    clear_normal_caches()
 
 
 if __name__ == "__main__":
@@ -11,9 +11,12 @@ bl_info = {
 }
 
 
-import bpy, bmesh
+import bpy, bmesh, re
+import numpy as np
+from bpy.app.handlers import persistent
+from fnmatch import fnmatchcase
 from bpy.types import UIList, Menu, Operator, PropertyGroup
-from bpy.props import IntProperty, StringProperty, BoolProperty, PointerProperty, EnumProperty
+from bpy.props import IntProperty, FloatProperty, StringProperty, BoolProperty, PointerProperty, EnumProperty
 
 
 #############################################################
@@ -24,6 +27,14 @@ class EASEtool_Selection_Property_Group(PropertyGroup):
     
     vg_name: StringProperty( name = "Name", description = "Name of the new vertex group", default = "Group")
     fm_name: StringProperty( name = "Name", description = "Name of the new face map", default = "FaceMap")
+    
+    ## Delete Groups
+    delete_filter: StringProperty( name = "Filter", description = "Only delete groups matching this name, * and ? wildcards or a regular expression", default = "")
+    use_regex: BoolProperty( name = "Regex", description = "Filter is a regular expression", default = False)
+    all_selected: BoolProperty( name = "All Selected", description = "Delete from all selected objects, not only the active one", default = False)
+    
+    ## Group stats
+    stats_weight: FloatProperty( name = "Weight", description = "Select groups with a mean weight of at least this", default = 0.5, min = 0.0, max = 1.0)
 
 
 #############################################################
@@ -35,7 +46,16 @@ class EASEtool_UL_Vertex_Group_List(UIList):
         if self.layout_type in {'DEFAULT', 'COMPACT'}:
             if item:
                 row = layout.split(factor = 0.52, align = True)
-                row.prop(item, "name", text="", emboss=False,)
+                r = row.split(factor = 0.6, align = True)
+                r.prop(item, "name", text="", emboss=False,)
+                
+                ## Vertex count and average weight, computed by a timer outside of drawing
+                stats = get_group_stats(data)
+                if stats is not None:
+                    r.label(text="%d | %.2f" % (stats["count"][item.index], stats["mean"][item.index]))
+                else:
+                    r.label(text="...")
+                    
                 row = row.row(align = True, translate = False)
                 
                 ## Lock
@@ -65,6 +85,20 @@ class EASEtool_UL_Vertex_Group_List(UIList):
             layout.alignment = 'CENTER'
             layout.label(text="", icon_value=icon)
             
+    def filter_items(self, context, data, propname):
+        ## Name search and alphabetical sort, the list only draws the rows in view
+        groups = getattr(data, propname)
+        helper = bpy.types.UI_UL_list
+        
+        flt_flags = []
+        if self.filter_name:
+            flt_flags = helper.filter_items_by_name(self.filter_name, self.bitflag_filter_item, groups, "name", reverse=False)
+        flt_neworder = []
+        if self.use_filter_sort_alpha:
+            flt_neworder = helper.sort_items_by_name(groups, "name")
+            
+        return flt_flags, flt_neworder
+            
                         
 class EASEtool_UL_Face_Map_List(UIList):
     def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index, flt_flag):
@@ -97,6 +131,358 @@ class EASEtool_UL_Face_Map_List(UIList):
             layout.label(text="", icon_value=icon)
 
 
+#############################################################
+####   FUNCTIONS    #########################################
+#############################################################
+
+def read_faces(obj, attribute: str, dtype) -> np.ndarray:
+    """
+    read a face attribute of an object in edit mode into an array
+    obj - mesh object, synced from edit mode before calling
+    attribute - polygon property, eg. 'loop_total', 'select'
+    """
+    polygons = obj.data.polygons
+    values = np.empty(len(polygons), dtype=dtype)
+    polygons.foreach_get(attribute, values)
+    
+    return values
+
+def set_face_selection(obj, select: np.ndarray):
+    """
+    select faces of an object in edit mode from a mask
+    selection has to be cleared first, deselecting face by face also deselects
+    vertices and edges shared with faces that stay selected
+    """
+    indices = np.flatnonzero(select)
+    if len(indices) == 0:
+        return
+    
+    mesh = obj.data
+    bm = bmesh.from_edit_mesh(mesh)
+    faces = bm.faces
+    faces.ensure_lookup_table()
+    for i in indices.tolist():
+        faces[i].select_set(True)
+        
+    bm.select_flush_mode()
+    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+    
+## Face attribute written by mesh.mod_weighted_strength
+FACE_STRENGTH_LAYER = "__mod_weightednormals_faceweight"
+## Weak, medium and strong
+FACE_STRENGTH_VALUES = [-16384, 0, 16384]
+
+def face_strength_masks(mesh) -> [np.ndarray]:
+    """
+    partition the faces of a mesh by face strength, in object mode
+    returns a weak, medium and strong face mask, faces without strength are medium
+    """
+    strength = np.zeros(len(mesh.polygons), dtype=np.int32)
+    attribute = mesh.attributes.get(FACE_STRENGTH_LAYER)
+    if attribute is not None and attribute.domain == 'FACE':
+        attribute.data.foreach_get("value", strength)
+        
+    return [strength == value for value in FACE_STRENGTH_VALUES]
+
+def set_face_attribute(mesh, name: str, mask: np.ndarray):
+    """write a mask into a boolean face attribute, replacing an attribute of another type"""
+    attribute = mesh.attributes.get(name)
+    if attribute is not None and (attribute.domain != 'FACE' or attribute.data_type != 'BOOLEAN'):
+        mesh.attributes.remove(attribute)
+        attribute = None
+    if attribute is None:
+        attribute = mesh.attributes.new(name, 'BOOLEAN', 'FACE')
+        
+    attribute.data.foreach_set("value", mask)
+    mesh.update_tag()
+
+def set_vertex_group_from_faces(obj, name: str, mask: np.ndarray):
+    """
+    replace a vertex group with the vertices of the faces in mask, in object mode
+    one add call for all vertices
+    """
+    mesh = obj.data
+    loop_total = read_faces(obj, "loop_total", np.int32)
+    loop_vert = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", loop_vert)
+    
+    verts = np.unique(loop_vert[np.repeat(mask, loop_total)])
+    
+    vertex_groups = obj.vertex_groups
+    group = vertex_groups.get(name)
+    if group is not None:
+        vertex_groups.remove(group)
+    group = vertex_groups.new(name=name)
+    if len(verts):
+        group.add(verts.tolist(), 1.0, 'REPLACE')
+
+def vertex_state(obj) -> (np.ndarray, np.ndarray):
+    """
+    vertex selection and hidden masks of an object in edit mode
+    """
+    obj.update_from_editmode()
+    vertices = obj.data.vertices
+    selected = np.empty(len(vertices), dtype=bool)
+    hidden = np.empty(len(vertices), dtype=bool)
+    vertices.foreach_get("select", selected)
+    vertices.foreach_get("hide", hidden)
+    
+    return selected, hidden
+
+def read_group_membership(bm, groups: []) -> np.ndarray:
+    """
+    which vertices belong to which of groups, from the bmesh deform layer
+    groups - vertex group indices
+    returns mask of vertices x groups
+    """
+    member = np.zeros((len(bm.verts), len(groups)), dtype=bool)
+    deform = bm.verts.layers.deform.active
+    if deform is None or not groups:
+        return member
+    
+    ## One pass over the deform layer for all groups
+    columns = {g: c for c, g in enumerate(groups)}
+    rows, cols = [], []
+    for i, v in enumerate(bm.verts):
+        for g in v[deform].keys():
+            c = columns.get(g)
+            if c is not None:
+                rows.append(i)
+                cols.append(c)
+    member[rows, cols] = True
+    
+    return member
+
+def select_vertex_groups(obj, groups: [], intersect: bool = False, select: bool = True):
+    """
+    select or deselect vertices of several vertex groups at once, without changing the active group
+    intersect - use vertices in all groups instead of any group
+    """
+    selected, hidden = vertex_state(obj)
+    mesh = obj.data
+    bm = bmesh.from_edit_mesh(mesh)
+    
+    member = read_group_membership(bm, groups)
+    mask = member.all(axis=1) if intersect else member.any(axis=1)
+    mask &= ~hidden
+    
+    ## Only vertices whose state changes
+    changed = np.flatnonzero(mask & (selected != select))
+    if len(changed) == 0:
+        return
+    
+    verts = bm.verts
+    verts.ensure_lookup_table()
+    for i in changed.tolist():
+        verts[i].select_set(select)
+    bm.select_flush(select)
+    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+def assign_vertex_groups(obj, weights: {}):
+    """
+    assign selected vertices to several vertex groups at once
+    weights - vertex group index -> weight
+    """
+    selected, hidden = vertex_state(obj)
+    indices = np.flatnonzero(selected & ~hidden)
+    if len(indices) == 0 or not weights:
+        return
+    
+    mesh = obj.data
+    bm = bmesh.from_edit_mesh(mesh)
+    deform = bm.verts.layers.deform.verify()
+    verts = bm.verts
+    verts.ensure_lookup_table()
+    
+    items = list(weights.items())
+    for i in indices.tolist():
+        d = verts[i][deform]
+        for g, w in items:
+            d[g] = w
+    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+def remove_from_vertex_groups(obj, groups: []):
+    """
+    remove selected vertices from several vertex groups at once
+    """
+    selected, hidden = vertex_state(obj)
+    indices = np.flatnonzero(selected & ~hidden)
+    mesh = obj.data
+    bm = bmesh.from_edit_mesh(mesh)
+    deform = bm.verts.layers.deform.active
+    if len(indices) == 0 or deform is None or not groups:
+        return
+    
+    verts = bm.verts
+    verts.ensure_lookup_table()
+    for i in indices.tolist():
+        d = verts[i][deform]
+        for g in groups:
+            if g in d:
+                del d[g]
+    bmesh.update_edit_mesh(mesh, loop_triangles=False, destructive=False)
+
+## Vertices read per timer tick, keeps the UI responsive on big meshes
+STATS_CHUNK = 20000
+
+## Object name -> count, min, max, mean weight and empty flag of every vertex group
+group_stats = {}
+## Object name -> partial stats the timer is still gathering
+stats_jobs = {}
+
+def new_stats_job(num_groups: int) -> {}:
+    """empty accumulators for the vertex group stats of an object"""
+    return {"start": 0,
+            "count": np.zeros(num_groups, dtype=np.int64),
+            "total": np.zeros(num_groups),
+            "min": np.full(num_groups, np.inf),
+            "max": np.full(num_groups, -np.inf)}
+
+def read_weights(obj, start: int, stop: int) -> (np.ndarray, np.ndarray, int):
+    """
+    group indices and weights of a range of vertices
+    returns groups, weights and the number of vertices of the mesh
+    """
+    groups, weights = [], []
+    
+    if obj.mode == 'EDIT':
+        bm = bmesh.from_edit_mesh(obj.data)
+        verts = bm.verts
+        deform = verts.layers.deform.active
+        if deform is not None:
+            verts.ensure_lookup_table()
+            for i in range(start, min(stop, len(verts))):
+                d = verts[i][deform]
+                groups.extend(d.keys())
+                weights.extend(d.values())
+        num_verts = len(verts)
+    else:
+        vertices = obj.data.vertices
+        for v in vertices[start:stop]:
+            for element in v.groups:
+                groups.append(element.group)
+                weights.append(element.weight)
+        num_verts = len(vertices)
+    
+    return np.array(groups, dtype=np.int64), np.array(weights), num_verts
+
+def step_group_stats(obj, job: {}) -> bool:
+    """
+    fold the next chunk of vertices into the job
+    returns True once all vertices are read
+    """
+    stop = job["start"] + STATS_CHUNK
+    groups, weights, num_verts = read_weights(obj, job["start"], stop)
+    job["start"] = stop
+    
+    ## Weights can point to deleted groups
+    num_groups = len(job["count"])
+    valid = groups < num_groups
+    groups, weights = groups[valid], weights[valid]
+    
+    job["count"] += np.bincount(groups, minlength=num_groups)
+    job["total"] += np.bincount(groups, weights=weights, minlength=num_groups)
+    np.minimum.at(job["min"], groups, weights)
+    np.maximum.at(job["max"], groups, weights)
+    
+    return stop >= num_verts
+
+def finish_group_stats(job: {}) -> {}:
+    """stats of a finished job, groups without vertices get zero weights"""
+    count = job["count"]
+    empty = count == 0
+    
+    return {"count": count,
+            "min": np.where(empty, 0.0, job["min"]),
+            "max": np.where(empty, 0.0, job["max"]),
+            "mean": np.divide(job["total"], count, out=np.zeros(len(count)), where=~empty),
+            "empty": empty}
+
+def compute_group_stats(obj) -> {}:
+    """
+    vertex group stats of an object, computed right away when not cached
+    used by operators, drawing goes through get_group_stats
+    """
+    stats = group_stats.get(obj.name)
+    if stats is not None and len(stats["count"]) == len(obj.vertex_groups):
+        return stats
+    
+    stats_jobs.pop(obj.name, None)
+    job = new_stats_job(len(obj.vertex_groups))
+    while not step_group_stats(obj, job):
+        pass
+    stats = group_stats[obj.name] = finish_group_stats(job)
+    
+    return stats
+
+def update_group_stats():
+    """Timer reading one chunk of vertices of every requested object per tick"""
+    for name, job in list(stats_jobs.items()):
+        obj = bpy.data.objects.get(name)
+        if obj is None or obj.type != 'MESH':
+            del stats_jobs[name]
+            continue
+        
+        ## Groups were added or removed since the job started
+        if len(job["count"]) != len(obj.vertex_groups):
+            stats_jobs[name] = new_stats_job(len(obj.vertex_groups))
+            continue
+        
+        if step_group_stats(obj, job):
+            del stats_jobs[name]
+            group_stats[name] = finish_group_stats(job)
+    
+    if stats_jobs:
+        return 0.01
+    
+    ## Show the new stats
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            area.tag_redraw()
+    
+    return None
+
+def get_group_stats(obj):
+    """
+    cached vertex group stats of an object, None while they are being computed
+    data can't change while drawing, so missing stats are left to a timer
+    """
+    stats = group_stats.get(obj.name)
+    if stats is not None and len(stats["count"]) == len(obj.vertex_groups):
+        return stats
+    
+    if obj.name not in stats_jobs:
+        stats_jobs[obj.name] = new_stats_job(len(obj.vertex_groups))
+    if not bpy.app.timers.is_registered(update_group_stats):
+        bpy.app.timers.register(update_group_stats, first_interval=0.05)
+        
+    return None
+
+@persistent
+def invalidate_group_stats(scene, depsgraph):
+    """Drop stats of objects whose geometry or weights changed, running jobs start over"""
+    if not group_stats and not stats_jobs:
+        return
+    for update in depsgraph.updates:
+        if update.is_updated_geometry and isinstance(update.id, bpy.types.Object):
+            name = update.id.original.name
+            group_stats.pop(name, None)
+            if name in stats_jobs:
+                stats_jobs[name] = new_stats_job(len(stats_jobs[name]["count"]))
+
+def name_matcher(pattern: str, use_regex: bool):
+    """
+    get a function testing names against a pattern
+    empty pattern matches everything, raises re.error for a bad regex
+    """
+    if not pattern:
+        return lambda name: True
+    if use_regex:
+        return re.compile(pattern).search
+    
+    return lambda name: fnmatchcase(name, pattern)
+    
+
 #############################################################
 ####    OPERATORS    ########################################
 #############################################################
@@ -105,16 +491,67 @@ class EASEtool_OT_Select_Ngons(Operator):
     """Select ngons, quad, tris"""
     bl_idname = "easetool.select_ngons"
     bl_label = "Select Ngons"
+    bl_options = {'REGISTER', 'UNDO'}
     
     type: EnumProperty( name="Type",
         items=[ ("GREATER", "Ngons", "More than 4"),
         ("EQUAL", "Quads", "4 vertices"),
         ("LESS", "Tris", "3 vertices")],
         )
+    number: IntProperty( name="Number of Vertices", default = 4, min = 3 )
+    mode: EnumProperty( name="Mode",
+        items=[ ("SET", "Set", "Replace selection"),
+        ("EXTEND", "Extend", "Add to selection"),
+        ("SUBTRACT", "Subtract", "Remove from selection"),
+        ("INTERSECT", "Intersect", "Keep selected faces that match")],
+        )
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'EDIT_MESH'
 
     def execute(self, context):
+        ## Set and extend don't need the current selection, the C operator does them on all objects
+        if self.mode in {"SET", "EXTEND"}:
+            if self.mode == "SET":
+                bpy.ops.mesh.select_all(action='DESELECT')
+            bpy.ops.mesh.select_face_by_sides(number=self.number, type=self.type, extend=True)
+            return {'FINISHED'}
+        
+        ## All objects in multi object edit mode, shared meshes once
+        masks = []
+        for obj in context.objects_in_mode_unique_data:
+            if obj.type != 'MESH':
+                continue
+            ## Write the edit mesh to mesh data so faces can be read in bulk
+            obj.update_from_editmode()
+            
+            sides = read_faces(obj, "loop_total", np.int32)
+            selected = read_faces(obj, "select", bool)
+            hidden = read_faces(obj, "hide", bool)
+            
+            if self.type == "GREATER":
+                match = sides > self.number
+            elif self.type == "EQUAL":
+                match = sides == self.number
+            else:
+                match = sides < self.number
+            match &= ~hidden
+                
+            if self.mode == "SUBTRACT":
+                select = selected & ~match
+            else:
+                select = selected & match
+            masks.append((obj, select, not np.array_equal(select, selected)))
+        
+        ## Nothing to deselect
+        if not any(changed for obj, select, changed in masks):
+            return {'FINISHED'}
+        
+        ## Clear all objects at once, then select what is left
         bpy.ops.mesh.select_all(action='DESELECT')
-        bpy.ops.mesh.select_face_by_sides(number=4, type=self.type)
+        for obj, select, changed in masks:
+            set_face_selection(obj, select)
               
         return {'FINISHED'}
 
@@ -137,12 +574,31 @@ class EASEtool_OT_Vertex_Group_Action(EASEtool_OT_Group_Action):
     """Select, deselect, remove, assign vertices to vertex groups"""
     bl_idname = "easetool.vertex_group_action"
     bl_label = "Vertex Group Action"
+    bl_options = {'REGISTER', 'UNDO'}
            
     def execute(self, context):        
         # Get the active object
         obj = context.active_object
-        # Set the active vertex group index
-        obj.vertex_groups.active_index = self.index
+        vertex_groups = obj.vertex_groups
+        if not 0 <= self.index < len(vertex_groups):
+            return {'CANCELLED'}
+        
+        ## Works on the group directly, the active group stays the same
+        if self.action == "DELETE":            
+            vertex_groups.remove(vertex_groups[self.index])
+            return {'FINISHED'}
+        
+        if obj.mode != 'EDIT':
+            self.report({'WARNING'}, "Vertex group selection and assignment needs edit mode")
+            return {'CANCELLED'}
+        
+        if vertex_groups[self.index].lock_weight and self.action in {"ASSIGN", "REMOVE"}:
+            self.report({'WARNING'}, "Vertex group is locked")
+            return {'CANCELLED'}
+        
+        ## One group is faster with the builtin operators, they work on the active group
+        active_index = vertex_groups.active_index
+        vertex_groups.active_index = self.index
         
         if self.action == "SELECT":
             bpy.ops.object.vertex_group_select()
@@ -152,10 +608,72 @@ class EASEtool_OT_Vertex_Group_Action(EASEtool_OT_Group_Action):
             bpy.ops.object.vertex_group_assign()
         elif self.action == "REMOVE":            
             bpy.ops.object.vertex_group_remove_from()
-        elif self.action == "DELETE":            
-            bpy.ops.object.vertex_group_remove()
+            
+        vertex_groups.active_index = active_index
 
         return {'FINISHED'}
+    
+class EASEtool_OT_Vertex_Groups_Bulk(Operator):
+    """Select, deselect, assign or remove selection for several vertex groups at once"""
+    bl_idname = "easetool.vertex_groups_bulk"
+    bl_label = "Vertex Groups Bulk Action"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    groups: StringProperty( name = "Groups", description = "Comma separated vertex group names, empty for all groups", default = "")
+    weights: StringProperty( name = "Weights", description = "Comma separated weights, one per group or one for all, empty for the tool weight", default = "")
+    action: EnumProperty( name="Action",
+        items = [ ("SELECT", "Select Union", "Select vertices in any of the groups"),
+        ("SELECT_INTERSECTION", "Select Intersection", "Select vertices in all of the groups"),
+        ("DESELECT", "Deselect", "Deselect vertices in any of the groups"),
+        ("ASSIGN", "Assign", "Assign selection to the groups"),
+        ("REMOVE", "Remove", "Remove selection from the groups")],
+        )
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'EDIT_MESH'
+    
+    def execute(self, context):
+        obj = context.active_object
+        vertex_groups = obj.vertex_groups
+        
+        names = [n.strip() for n in self.groups.split(",") if n.strip()]
+        if names:
+            missing = [n for n in names if n not in vertex_groups]
+            if missing:
+                self.report({'WARNING'}, "Vertex groups not found: " + ", ".join(missing))
+            groups = [vertex_groups[n].index for n in names if n in vertex_groups]
+        else:
+            groups = list(range(len(vertex_groups)))
+            
+        ## Locked groups keep their weights
+        if self.action in {"ASSIGN", "REMOVE"}:
+            groups = [g for g in groups if not vertex_groups[g].lock_weight]
+        
+        if self.action == "SELECT":
+            select_vertex_groups(obj, groups)
+        elif self.action == "SELECT_INTERSECTION":
+            select_vertex_groups(obj, groups, intersect=True)
+        elif self.action == "DESELECT":
+            select_vertex_groups(obj, groups, select=False)
+        elif self.action == "ASSIGN":
+            try:
+                weights = [float(w) for w in self.weights.split(",") if w.strip()]
+            except ValueError:
+                self.report({'ERROR'}, "Weights must be numbers")
+                return {'CANCELLED'}
+            if not weights:
+                weights = [context.scene.tool_settings.vertex_group_weight]
+            if len(weights) == 1:
+                weights = weights * len(groups)
+            elif len(weights) != len(groups):
+                self.report({'ERROR'}, "Give one weight, or one weight per group")
+                return {'CANCELLED'}
+            assign_vertex_groups(obj, dict(zip(groups, weights)))
+        elif self.action == "REMOVE":
+            remove_from_vertex_groups(obj, groups)
+            
+        return {'FINISHED'}
 
 class EASEtool_OT_Face_Map_Action(EASEtool_OT_Group_Action):
     """Select, deselect, remove, assign faces to face map"""
@@ -220,66 +738,156 @@ class EASEtool_OT_Face_Map_From_Selection(Operator):
     
 
 class EASEtool_OT_Face_Maps_From_Face_Strength(Operator):
-    """Make face map from selection, removes maps with names: 'Weak', 'Medium', 'Strong'"""
+    """Make groups 'Weak', 'Medium', 'Strong' from face strength on all selected meshes, replacing old ones"""
     bl_idname = "easetool.face_map_from_face_strength"
-    bl_label = "New Maps From Face Strength"
+    bl_label = "New Groups From Face Strength"
+    bl_options = {'REGISTER', 'UNDO'}
     
     names = ["Weak", "Medium", "Strong"]
+    
+    output: EnumProperty( name="Output",
+        items=[ ("ATTRIBUTE", "Face Attributes", "Boolean face attributes"),
+                ("VERTEX_GROUP", "Vertex Groups", "Vertex groups of the faces' vertices"),],
+        default="ATTRIBUTE")
        
     def execute(self, context):
-        ## remove old
-        obj = context.active_object
-        face_maps = obj.face_maps
-        for n in self.names: ## Loop over names
-            face_map = face_maps.get(n, False) ## Get Index if found
-            if face_map:
-                face_maps.active_index = face_map.index
-                bpy.ops.object.face_map_remove() ## Remove
-
-        ## Weak
-        bpy.ops.mesh.mod_weighted_strength(set=False, face_strength='WEAK')
-        bpy.ops.easetool.face_map_from_selection(name=self.names[0])
-        
-        ## Menum
-        bpy.ops.mesh.mod_weighted_strength(set=False, face_strength='MEDIUM')
-        bpy.ops.easetool.face_map_from_selection(name=self.names[1])
-       
-        ## Strong
-        bpy.ops.mesh.mod_weighted_strength(set=False, face_strength='STRONG')
-        bpy.ops.easetool.face_map_from_selection(name=self.names[2])
+        objects = [o for o in context.selected_objects if o.type == 'MESH']
+        if not objects:
+            self.report({'WARNING'}, "No meshes selected")
+            return {'CANCELLED'}
+        
+        ## Data can only be written outside of edit mode, switch once for all objects
+        edit_mode = context.mode == 'EDIT_MESH'
+        if edit_mode:
+            bpy.ops.object.mode_set(mode='OBJECT')
+        
+        if self.output == "ATTRIBUTE":
+            ## Shared meshes once
+            for mesh in {o.data for o in objects}:
+                masks = face_strength_masks(mesh)
+                for name, mask in zip(self.names, masks):
+                    set_face_attribute(mesh, name, mask)
+        else:
+            for obj in objects:
+                masks = face_strength_masks(obj.data)
+                for name, mask in zip(self.names, masks):
+                    set_vertex_group_from_faces(obj, name, mask)
+        
+        if edit_mode:
+            bpy.ops.object.mode_set(mode='EDIT')
                       
         return {'FINISHED'}
     
 
-class EASEtool_OT_Delete_All_Vertex_Groups(Operator):
-    """Delete all vertex groups"""
-    bl_idname = "easetool.delete_all_vertex_groups"
-    bl_label = "Delete All Vertex Groups"
-    bl_icon = "TRASH"
-       
+class EASEtool_OT_Delete_Groups(Operator):
+    """Parent for deleting groups through data, without an operator call per group"""
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    ## Object collection holding the groups
+    groups = "vertex_groups"
+    
+    name_filter: StringProperty( name = "Filter", description = "Only delete groups matching this name, * and ? wildcards or a regular expression", default = "")
+    use_regex: BoolProperty( name = "Regex", description = "Filter is a regular expression", default = False)
+    all_selected: BoolProperty( name = "All Selected", description = "Delete from all selected objects, not only the active one", default = False)
+    
     def execute(self, context):
-        obj = context.active_object
-        vertex_groups = obj.vertex_groups        
+        try:
+            match = name_matcher(self.name_filter, self.use_regex)
+        except re.error as error:
+            self.report({'ERROR'}, "Invalid regular expression: " + str(error))
+            return {'CANCELLED'}
+        
+        objects = {context.active_object}
+        if self.all_selected:
+            objects.update(context.selected_objects)
+            
+        removed = 0
+        for obj in objects:
+            groups = getattr(obj, self.groups, None)
+            if not groups:
+                continue
+            
+            if not self.name_filter:
+                removed += len(groups)
+                groups.clear()
+            else:
+                for group in [g for g in groups if match(g.name)]:
+                    groups.remove(group)
+                    removed += 1
         
-        for i in range(len(vertex_groups)-1, -1, -1):
-            obj.vertex_groups.active_index = i        
-            bpy.ops.object.vertex_group_remove()
+        self.report({'INFO'}, "Deleted %d groups" % removed)
                       
         return {'FINISHED'}
+
+class EASEtool_OT_Delete_All_Vertex_Groups(EASEtool_OT_Delete_Groups):
+    """Delete all vertex groups, or the ones matching the filter"""
+    bl_idname = "easetool.delete_all_vertex_groups"
+    bl_label = "Delete All Vertex Groups"
+    bl_icon = "TRASH"
     
-class EASEtool_OT_Delete_All_Face_Maps(Operator):
-    """Delete all face maps"""
+    groups = "vertex_groups"
+    
+class EASEtool_OT_Delete_All_Face_Maps(EASEtool_OT_Delete_Groups):
+    """Delete all face maps, or the ones matching the filter"""
     bl_idname = "easetool.delete_all_face_maps"
     bl_label = "Delete All Face Maps"
     bl_icon = "TRASH"
-       
+    
+    ## Face maps don't exist in blender 4, getattr skips them there
+    groups = "face_maps"
+    
+
+class EASEtool_OT_Delete_Empty_Vertex_Groups(Operator):
+    """Delete vertex groups without any vertices"""
+    bl_idname = "easetool.delete_empty_vertex_groups"
+    bl_label = "Delete Empty Groups"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    all_selected: BoolProperty( name = "All Selected", description = "Delete from all selected objects, not only the active one", default = False)
+    
+    def execute(self, context):
+        objects = {context.active_object}
+        if self.all_selected:
+            objects.update(context.selected_objects)
+            
+        removed = 0
+        for obj in objects:
+            if obj is None or obj.type != 'MESH' or not obj.vertex_groups:
+                continue
+            
+            stats = compute_group_stats(obj)
+            vertex_groups = obj.vertex_groups
+            ## Highest index first, removing shifts the ones after it
+            for i in np.flatnonzero(stats["empty"])[::-1].tolist():
+                vertex_groups.remove(vertex_groups[i])
+                removed += 1
+            group_stats.pop(obj.name, None)
+        
+        self.report({'INFO'}, "Deleted %d empty groups" % removed)
+                      
+        return {'FINISHED'}
+    
+class EASEtool_OT_Select_Vertex_Groups_By_Weight(Operator):
+    """Select the vertices of all groups with a mean weight of at least Weight"""
+    bl_idname = "easetool.select_vertex_groups_by_weight"
+    bl_label = "Select Groups Above Weight"
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    weight: FloatProperty( name = "Weight", description = "Lowest mean weight of the selected groups", default = 0.5, min = 0.0, max = 1.0)
+    
+    @classmethod
+    def poll(cls, context):
+        return context.mode == 'EDIT_MESH'
+    
     def execute(self, context):
         obj = context.active_object
-        face_maps = obj.face_maps        
-
-        for i in range(len(face_maps)-1, -1, -1):
-            face_maps.active_index = i
-            bpy.ops.object.face_map_remove()
+        stats = compute_group_stats(obj)
+        
+        groups = np.flatnonzero(~stats["empty"] & (stats["mean"] >= self.weight)).tolist()
+        if groups:
+            select_vertex_groups(obj, groups)
+        
+        self.report({'INFO'}, "Selected %d groups" % len(groups))
                       
         return {'FINISHED'}
         
@@ -334,6 +942,8 @@ class EASEtool_UI_Selection(Operator):
         op3 = col.operator("mesh.mod_weighted_strength", text="Strong")
         op1.face_strength, op2.face_strength, op3.face_strength = "WEAK", "MEDIUM", "STRONG"
         op1.set, op2.set, op3.set = False, False, False
+        col.separator()
+        col.operator("easetool.face_map_from_face_strength", text="Groups From Strength", icon="MOD_NORMALEDIT").output = "VERTEX_GROUP"
         
         col = row.column(align=True)
         col.label(text="Geometry:")
@@ -386,10 +996,24 @@ class EASEtool_UI_Selection(Operator):
         col.separator()
         col.prop(scene.tool_settings, "vertex_group_weight", text="Weight")
         col.operator("easetool.vertex_group_from_selection", icon="RESTRICT_SELECT_OFF").name = props.vg_name
+        col.operator("easetool.vertex_groups_bulk", text="Remove Selection From All", icon="REMOVE").action = "REMOVE"
         
         ## Delete all            
         col.separator()
-        col.operator("easetool.delete_all_vertex_groups", icon="TRASH")
+        row = col.row(align=True)
+        row.prop(props, "delete_filter", text="", icon="FILTER")
+        row.prop(props, "use_regex", text="", icon="SORTALPHA")
+        row.prop(props, "all_selected", text="", icon="OBJECT_DATA")
+        op = col.operator("easetool.delete_all_vertex_groups", icon="TRASH")
+        op.name_filter = props.delete_filter
+        op.use_regex = props.use_regex
+        op.all_selected = props.all_selected
+        col.operator("easetool.delete_empty_vertex_groups", icon="TRASH").all_selected = props.all_selected
+        
+        ## Select by stats
+        row = col.row(align=True)
+        row.prop(props, "stats_weight", text="Mean")
+        row.operator("easetool.select_vertex_groups_by_weight", text="Select", icon="RESTRICT_SELECT_OFF").weight = props.stats_weight
         
 
 #        ## Column three        
@@ -424,9 +1048,10 @@ class EASEtool_UI_Selection(Operator):
 classes = [ EASEtool_UI_Selection, EASEtool_Selection_Property_Group,
             EASEtool_UL_Vertex_Group_List, EASEtool_UL_Face_Map_List,
             EASEtool_OT_Select_Ngons,
-            EASEtool_OT_Group_Action, EASEtool_OT_Face_Map_Action, EASEtool_OT_Vertex_Group_Action,
+            EASEtool_OT_Group_Action, EASEtool_OT_Face_Map_Action, EASEtool_OT_Vertex_Group_Action, EASEtool_OT_Vertex_Groups_Bulk,
             EASEtool_OT_Vertex_Group_From_Selection, EASEtool_OT_Face_Map_From_Selection, EASEtool_OT_Face_Maps_From_Face_Strength,
-            EASEtool_OT_Delete_All_Vertex_Groups, EASEtool_OT_Delete_All_Face_Maps,            
+            EASEtool_OT_Delete_All_Vertex_Groups, EASEtool_OT_Delete_All_Face_Maps,
+            EASEtool_OT_Delete_Empty_Vertex_Groups, EASEtool_OT_Select_Vertex_Groups_By_Weight,            
             ]  
 addon_keymaps = []
 
@@ -456,10 +1081,18 @@ def register():
 #    register_keymaps()
     ## Register properties
     bpy.types.Scene.ease_sel_props = PointerProperty(type = EASEtool_Selection_Property_Group)
+    
+    bpy.app.handlers.depsgraph_update_post.append(invalidate_group_stats)
         
 def unregister():
     for c in classes:
         unregister_class(c)
+        
+    bpy.app.handlers.depsgraph_update_post.remove(invalidate_group_stats)
+    if bpy.app.timers.is_registered(update_group_stats):
+        bpy.app.timers.unregister(update_group_stats)
+    group_stats.clear()
+    stats_jobs.clear()
     
     unregister_keymaps()    
     del bpy.types.Scene.ease_sel_props
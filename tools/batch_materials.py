@@ -0,0 +1,198 @@
+"""
+Material cleanup over many .blend files
+
+Runs the Material Manager operators on every file and saves it, one background blender per file,
+several at once. Steps run in this order: delete unused slots, delete orphan materials, colorize.
+    python tools/batch_materials.py --jobs 8 --log cleanup.jsonl assets/
+    python tools/batch_materials.py --steps slots orphans --recursive --output-dir cleaned/ assets/
+A file whose steps fail isn't saved.
+"""
+
+import os, sys, json, time, argparse, tempfile
+
+try:
+    import bpy
+except ImportError:
+    ## Driver side, blender isn't needed to start the workers
+    bpy = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from easetool_headless import load_addon, script_args, get_operator, find_blend_files, blender_command, run_pool
+
+## name -> operator
+STEPS = {
+    "slots": "easetool.delete_unused_slots",
+    "orphans": "easetool.delete_unused_materials",
+    "colorize": "easetool.colorize",
+}
+
+
+#############################################################
+####    WORKER    ###########################################
+#############################################################
+
+def counts(materials_addon) -> {}:
+    """Material slots, materials and other material related data in the open file"""
+    data = bpy.data
+    return {
+        "slots": sum(len(d.materials) for d in materials_addon.group_by_data(data.objects)),
+        "materials": len(data.materials),
+        "data_blocks": len(data.materials) + len(data.node_groups) + len(data.textures) + len(data.images),
+    }
+
+
+def work(args) -> {}:
+    """
+    run the steps on the open file and save it
+    returns the summary of the file
+    """
+    materials_addon = load_addon("materials")
+    summary = {"file": bpy.data.filepath, "steps": [], "before": counts(materials_addon)}
+
+    properties = {"orphans": {"recursive": args.recursive}, "slots": {"selected_only": False}}
+    failed = False
+    for name in [s for s in STEPS if s in args.steps]:
+        operator = get_operator(STEPS[name])
+        step = {"name": name}
+
+        start = time.perf_counter()
+        if not operator.poll():
+            ## Eg. no materials left to colorize
+            step["skipped"] = True
+        else:
+            try:
+                operator(**properties.get(name, {}))
+            except Exception as error:
+                step["error"] = str(error).strip()
+                failed = True
+        step["seconds"] = time.perf_counter() - start
+
+        summary["steps"].append(step)
+        if failed:
+            break
+
+    summary["after"] = counts(materials_addon)
+
+    if not failed and not args.dry_run:
+        start = time.perf_counter()
+        ## The driver passes the path of the copy, keeping the folder layout of the inputs
+        path = args.save_as
+        if path is None and args.output_dir:
+            path = os.path.join(args.output_dir, os.path.basename(bpy.data.filepath))
+        if path:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            bpy.ops.wm.save_as_mainfile(filepath=path, copy=True)
+            summary["saved_as"] = path
+        else:
+            bpy.ops.wm.save_mainfile()
+        summary["save_seconds"] = time.perf_counter() - start
+    summary["saved"] = not failed and not args.dry_run
+
+    with open(args.summary, "w") as file:
+        json.dump(summary, file)
+
+    return summary
+
+
+#############################################################
+####    DRIVER    ###########################################
+#############################################################
+
+def worker_args(args, summary: str, save_as: str) -> []:
+    """arguments passed on to a worker"""
+    argv = ["--summary", summary, "--steps", *args.steps]
+    if args.recursive:
+        argv.append("--recursive")
+    if args.dry_run:
+        argv.append("--dry-run")
+    if save_as:
+        argv += ["--save-as", save_as]
+
+    return argv
+
+
+def copy_paths(files: [], output_dir: str) -> []:
+    """
+    paths of the cleaned copies in output_dir
+    relative to the folder all files share, so files with the same name in different folders don't collide
+    """
+    if not output_dir:
+        return [None] * len(files)
+    
+    files = [os.path.abspath(f) for f in files]
+    root = os.path.commonpath([os.path.dirname(f) for f in files])
+    output_dir = os.path.abspath(output_dir)
+    
+    return [os.path.join(output_dir, os.path.relpath(f, root)) for f in files]
+
+
+def drive(args) -> int:
+    """Clean every file with a pool of background blenders, log a summary per file"""
+    files = find_blend_files(args.paths)
+    if not files:
+        print("No .blend files found")
+        return 1
+
+    script = os.path.abspath(__file__)
+    folder = tempfile.mkdtemp(prefix="easetool_batch_")
+    summaries = [os.path.join(folder, "%05d.json" % i) for i in range(len(files))]
+    copies = copy_paths(files, args.output_dir)
+    commands = [blender_command(args.blender, f, script, worker_args(args, s, c)) for f, s, c in zip(files, summaries, copies)]
+
+    start = time.perf_counter()
+    failed = 0
+    with open(args.log, "w") as log:
+        for i, returncode, seconds, output in run_pool(commands, args.jobs):
+            summary = {"file": files[i]}
+            if os.path.exists(summaries[i]):
+                with open(summaries[i]) as file:
+                    summary.update(json.load(file))
+                os.remove(summaries[i])
+            summary["returncode"] = returncode
+            summary["seconds"] = seconds
+
+            errors = [s["error"] for s in summary.get("steps", []) if "error" in s]
+            ok = returncode == 0 and "after" in summary and not errors
+            failed += not ok
+            if not ok:
+                summary["output"] = output
+            log.write(json.dumps(summary) + "\n")
+
+            if ok:
+                before, after = summary["before"], summary["after"]
+                print("ok     %8.2f s  %s  slots %d -> %d, materials %d -> %d" % (
+                    seconds, files[i], before["slots"], after["slots"], before["materials"], after["materials"]))
+            else:
+                print("FAILED %8.2f s  %s  %s" % (seconds, files[i], "; ".join(errors) or "blender exited with %d" % returncode))
+    os.rmdir(folder)
+
+    print("Processed %d files in %.2f s with %d jobs, %d failed, log %s" % (
+        len(files), time.perf_counter() - start, args.jobs, failed, args.log))
+    return 1 if failed else 0
+
+
+def parse_args(argv: []):
+    parser = argparse.ArgumentParser(prog="batch_materials.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help=".blend files or folders")
+    parser.add_argument("--steps", nargs="+", choices=list(STEPS), default=list(STEPS), help="steps to run")
+    parser.add_argument("--recursive", action="store_true", help="also delete node groups, textures and images left without users")
+    parser.add_argument("--output-dir", help="save copies here instead of overwriting the files")
+    parser.add_argument("--dry-run", action="store_true", help="don't save, only log what would change")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="blender executable")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="blender processes at once")
+    parser.add_argument("--log", default="batch_materials.jsonl", help="JSON lines log, one summary per file")
+    parser.add_argument("--summary", help="summary file of a worker, set by the driver")
+    parser.add_argument("--save-as", help="path of the copy of a worker, set by the driver")
+
+    return parser.parse_args(argv)
+
+
+def main():
+    if bpy is None:
+        sys.exit(drive(parse_args(sys.argv[1:])))
+    else:
+        work(parse_args(script_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Headless benchmark for the EASEtool addons
+
+Builds synthetic scenes and times the addon operators, results are written to JSON.
+    blender -b --factory-startup --python tools/benchmark.py -- --output bench.json
+    blender -b --factory-startup --python tools/benchmark.py -- --output new.json --compare bench.json
+Older addon versions are timed the same way by pointing --addons at their checkout.
+"""
+
+import os, sys, json, time, argparse, statistics
+
+import bpy
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from easetool_headless import ROOT, ADDONS, load_addon, script_args, get_operator
+
+
+#############################################################
+####    SCENE    ############################################
+#############################################################
+
+def clear_scene():
+    """Remove all data the benchmark creates"""
+    data = bpy.data
+    ids = [*data.objects, *data.meshes, *data.materials, *data.node_groups, *data.images]
+    if ids:
+        data.batch_remove(ids)
+
+
+def grid_mesh(name: str, faces: int):
+    """
+    create a grid mesh with about faces quads, built directly from arrays
+    """
+    size = max(int(np.ceil(np.sqrt(faces))), 1)
+    
+    x, y = np.meshgrid(np.arange(size + 1, dtype=np.float32), np.arange(size + 1, dtype=np.float32))
+    co = np.column_stack((x.ravel(), y.ravel(), np.zeros(x.size, dtype=np.float32)))
+    
+    ## Quad corners, counter clockwise
+    row, col = np.meshgrid(np.arange(size), np.arange(size), indexing="ij")
+    v0 = (row * (size + 1) + col).ravel()
+    corners = np.column_stack((v0, v0 + 1, v0 + size + 2, v0 + size + 1)).ravel()
+    
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co))
+    mesh.vertices.foreach_set("co", co.ravel())
+    mesh.loops.add(len(corners))
+    mesh.loops.foreach_set("vertex_index", corners.astype(np.int32))
+    mesh.polygons.add(size * size)
+    mesh.polygons.foreach_set("loop_start", np.arange(0, len(corners), 4, dtype=np.int32))
+    mesh.polygons.foreach_set("loop_total", np.full(size * size, 4, dtype=np.int32))
+    mesh.update(calc_edges=True)
+    
+    return mesh
+
+
+def scene_material(name: str, color: ()):
+    """material with a principled shader, built without the addons so any version of them can be timed"""
+    material = bpy.data.materials.new(name=name)
+    material.use_nodes = True
+    shader = material.node_tree.nodes.get("Principled BSDF")
+    if shader:
+        shader.inputs[0].default_value = color
+    material.diffuse_color = color
+    
+    return material
+
+
+def build_scene(args):
+    """
+    synthetic scene with args.objects objects, args.materials materials,
+    args.vertex_groups vertex groups per object and about args.faces faces per object
+    """
+    clear_scene()
+    rng = np.random.default_rng(args.seed)
+    
+    materials = [scene_material("Mat.%05d" % i, (*rng.random(3), 1.0)) for i in range(args.materials)]
+    
+    collection = bpy.context.scene.collection
+    view_layer = bpy.context.view_layer
+    
+    mesh = None
+    for i in range(args.objects):
+        ## Every other object is a linked duplicate
+        if mesh is None or not args.linked or i % 2 == 0:
+            mesh = grid_mesh("Mesh.%05d" % i, args.faces)
+            
+            ## A few material slots with random face assignments, materials no mesh picks stay orphans
+            if materials:
+                for m in rng.choice(len(materials), size=min(args.slots, len(materials)), replace=False):
+                    mesh.materials.append(materials[m])
+                indices = rng.integers(0, len(mesh.materials), len(mesh.polygons), dtype=np.int32)
+                mesh.polygons.foreach_set("material_index", indices)
+            
+        obj = bpy.data.objects.new("Object.%05d" % i, mesh)
+        obj.location = (i % 32 * 2.0 * np.sqrt(args.faces), i // 32 * 2.0 * np.sqrt(args.faces), 0)
+        collection.objects.link(obj)
+        
+        vertex_count = len(mesh.vertices)
+        for g in range(args.vertex_groups):
+            group = obj.vertex_groups.new(name="Group.%03d" % g)
+            members = rng.choice(vertex_count, size=max(vertex_count // 8, 1), replace=False)
+            group.add(members.tolist(), float(rng.random()), 'REPLACE')
+        
+        obj.select_set(True)
+        
+    if collection.objects:
+        view_layer.objects.active = collection.objects[0]
+    view_layer.update()
+
+
+def set_mode(mode: str):
+    """Switch the active object (and selected meshes) to OBJECT or EDIT mode"""
+    if bpy.context.view_layer.objects.active is None:
+        return
+    if bpy.context.object.mode != mode:
+        bpy.ops.object.mode_set(mode=mode)
+    if mode == 'EDIT':
+        bpy.ops.mesh.select_all(action='SELECT')
+        
+
+#############################################################
+####    CASES    ############################################
+#############################################################
+
+## name, operator, properties, mode
+CASES = [
+    ("add_material_front", "easetool.add_material", {"index": 0, "selected_only": False, "to_end": False}, 'OBJECT'),
+    ("add_material_end", "easetool.add_material", {"index": 0, "selected_only": False, "to_end": True}, 'OBJECT'),
+    ("remove_material", "easetool.remove_material", {"index": 0, "selected_only": False}, 'OBJECT'),
+    ("remove_material_slot", "easetool.remove_material", {"index": 0, "selected_only": False, "delete_slot": True}, 'OBJECT'),
+    ("delete_unused_slots", "easetool.delete_unused_slots", {"selected_only": False}, 'OBJECT'),
+    ("delete_unused_materials", "easetool.delete_unused_materials", {}, 'OBJECT'),
+    ("purge_orphans", "easetool.delete_unused_materials", {"recursive": True}, 'OBJECT'),
+    ("delete_all_materials", "easetool.delete_materials", {"delete_all": True}, 'OBJECT'),
+    ("create_material", "easetool.create_material", {"random_color": True}, 'OBJECT'),
+    ("create_face_strength_material", "easetool.create_face_strength_material", {}, 'OBJECT'),
+    ("create_ngon_material", "easetool.create_ngon_material", {}, 'OBJECT'),
+    ("colorize", "easetool.colorize", {}, 'OBJECT'),
+    ("set_shade_smooth", "easetool.set_shade_mode", {"mode": "SMOOTH"}, 'OBJECT'),
+    ("set_shade_flat", "easetool.set_shade_mode", {"mode": "FLAT"}, 'OBJECT'),
+    ("toggle_auto_smooth", "easetool.toggle_auto_smooth", {}, 'OBJECT'),
+    ("set_auto_smooth_angle", "easetool.set_auto_smooth_angle", {"angle": 30}, 'OBJECT'),
+    ("add_weighted_normal", "easetool.add_weighted_normal", {}, 'OBJECT'),
+    ("select_ngons", "easetool.select_ngons", {"type": "GREATER"}, 'EDIT'),
+    ("select_quads", "easetool.select_ngons", {"type": "EQUAL"}, 'EDIT'),
+    ("select_quads_subtract", "easetool.select_ngons", {"type": "EQUAL", "mode": "SUBTRACT"}, 'EDIT'),
+    ("select_quads_intersect", "easetool.select_ngons", {"type": "EQUAL", "mode": "INTERSECT"}, 'EDIT'),
+    ("set_face_strength", "easetool.set_face_strength", {"face_strength": "STRONG"}, 'EDIT'),
+    ("select_face_strength", "easetool.select_face_strength", {"face_strength": "STRONG"}, 'EDIT'),
+    ("vertex_group_select", "easetool.vertex_group_action", {"index": 0, "action": "SELECT"}, 'EDIT'),
+    ("vertex_group_assign", "easetool.vertex_group_action", {"index": 0, "action": "ASSIGN"}, 'EDIT'),
+    ("vertex_group_remove_from", "easetool.vertex_group_action", {"index": 0, "action": "REMOVE"}, 'EDIT'),
+    ("vertex_groups_bulk_select", "easetool.vertex_groups_bulk", {"groups": "Group.000,Group.001", "action": "SELECT"}, 'EDIT'),
+    ("vertex_groups_bulk_assign", "easetool.vertex_groups_bulk", {"groups": "Group.000,Group.001", "action": "ASSIGN"}, 'EDIT'),
+    ("vertex_groups_bulk_remove_from", "easetool.vertex_groups_bulk", {"groups": "Group.000,Group.001", "action": "REMOVE"}, 'EDIT'),
+    ("vertex_group_from_selection", "easetool.vertex_group_from_selection", {}, 'EDIT'),
+    ("delete_all_vertex_groups", "easetool.delete_all_vertex_groups", {}, 'EDIT'),
+    ("face_maps_from_face_strength", "easetool.face_map_from_face_strength", {}, 'EDIT'),
+]
+
+
+def run_case(case, args) -> {}:
+    """
+    time one operator, the scene is rebuilt before every run so destructive operators start from the same state
+    """
+    name, idname, properties, mode = case
+    result = {"name": name, "operator": idname, "properties": properties, "mode": mode, "times": []}
+    
+    operator = get_operator(idname)
+    for _ in range(args.repeat):
+        set_mode('OBJECT')
+        build_scene(args)
+        set_mode(mode)
+        
+        try:
+            start = time.perf_counter()
+            operator(**properties)
+            result["times"].append(time.perf_counter() - start)
+        except Exception as error:
+            ## Operators can fail poll or use API missing from this blender version
+            result["error"] = str(error).strip()
+            break
+    
+    times = result["times"]
+    if times:
+        result["min"] = min(times)
+        result["median"] = statistics.median(times)
+        result["mean"] = statistics.fmean(times)
+        
+    return result
+
+
+#############################################################
+####    MAIN    #############################################
+#############################################################
+
+def compare(results: [], path: str):
+    """Print median time of every case against an older result file"""
+    with open(path) as file:
+        old = {r["name"]: r for r in json.load(file)["results"]}
+        
+    print("%-32s %12s %12s %8s" % ("case", "old (s)", "new (s)", "ratio"))
+    for r in results:
+        o = old.get(r["name"])
+        if not o or "median" not in o or "median" not in r:
+            continue
+        ratio = r["median"] / o["median"] if o["median"] else float("inf")
+        flag = "  SLOWER" if ratio > 1.1 else ""
+        print("%-32s %12.5f %12.5f %8.2f%s" % (r["name"], o["median"], r["median"], ratio, flag))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="benchmark.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--objects", type=int, default=200, help="nr of objects")
+    parser.add_argument("--materials", type=int, default=500, help="nr of materials")
+    parser.add_argument("--vertex-groups", type=int, default=20, help="nr of vertex groups per object")
+    parser.add_argument("--faces", type=int, default=2500, help="nr of faces per mesh")
+    parser.add_argument("--slots", type=int, default=4, help="nr of material slots per mesh")
+    parser.add_argument("--linked", action="store_true", help="make every other object a linked duplicate")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per case")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cases", nargs="*", help="only run these cases")
+    parser.add_argument("--output", default="easetool_benchmark.json", help="JSON result file")
+    parser.add_argument("--addons", help="folder with the addon files to time, this checkout by default")
+    parser.add_argument("--compare", help="older JSON result file to compare against")
+    
+    return parser.parse_args(script_args())
+
+
+def main():
+    args = parse_args()
+    
+    root = os.path.abspath(args.addons) if args.addons else ROOT
+    addons = {name: load_addon(name, root=root) for name in ADDONS}
+    
+    cases = [c for c in CASES if not args.cases or c[0] in args.cases]
+    results = []
+    for case in cases:
+        result = run_case(case, args)
+        results.append(result)
+        print("%-32s %s" % (case[0], "%.5f s" % result["median"] if "median" in result else "ERROR " + result.get("error", "")))
+    
+    report = {
+        "blender": bpy.app.version_string,
+        "addons": {name: ".".join(map(str, module.bl_info["version"])) for name, module in addons.items()},
+        "params": {k: v for k, v in vars(args).items() if k not in {"output", "compare"}},
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+    print("Saved", args.output)
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
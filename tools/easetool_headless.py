@@ -0,0 +1,98 @@
+"""
+Helpers for running the EASEtool addons without the UI
+
+The scripts in this folder run inside blender, eg.
+    blender -b --python tools/benchmark.py -- --output bench.json
+Scripts working on many files also run from plain python and start a blender per file,
+this module doesn't import bpy so both sides can use it.
+"""
+
+import os, sys, time, subprocess
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+## The addons are single files in the repository root
+ADDONS = {
+    "materials": "Material_Manager_Panel_v_1_0.py",
+    "normals": "Normal_Edit_Pie_v1_2_3.py",
+    "selection": "Selection_Menu_v_1_1_1.py",
+}
+
+
+def load_addon(name: str, register: bool = True, root: str = ROOT):
+    """
+    import an addon file as a module
+    name - key in ADDONS, register - register its classes and properties
+    root - folder holding the addon files, eg. an older checkout to compare against
+    """
+    path = os.path.join(root, ADDONS[name])
+    spec = importlib.util.spec_from_file_location("easetool_" + name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    
+    if register:
+        module.register()
+        
+    return module
+
+
+def script_args() -> []:
+    """
+    get arguments meant for the script
+    blender stops reading its own arguments at '--'
+    """
+    argv = sys.argv
+    if "--" in argv:
+        return argv[argv.index("--") + 1:]
+    
+    return []
+
+
+def get_operator(idname: str):
+    """operator from its idname, eg. 'easetool.colorize', only inside blender"""
+    import bpy
+    category, name = idname.split(".")
+    return getattr(getattr(bpy.ops, category), name)
+
+
+def find_blend_files(paths: []) -> []:
+    """
+    .blend files in paths, sorted
+    paths - files or folders, folders are searched recursively
+    """
+    files = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for folder, _, names in os.walk(path):
+                files.update(os.path.join(folder, n) for n in names if n.endswith(".blend"))
+        elif path.endswith(".blend"):
+            files.add(path)
+            
+    return sorted(files)
+
+
+def blender_command(blender: str, blend_file: str, script: str, args: []) -> []:
+    """
+    command running script on blend_file in a background blender
+    blender exits with 0 even when the script raises, unless it is told otherwise
+    """
+    return [blender, "-b", "--factory-startup", blend_file, "--python-exit-code", "1", "--python", script, "--", *args]
+
+
+def run_pool(commands: [], jobs: int):
+    """
+    run commands with at most jobs processes at once
+    every blender is its own process, threads only wait for them
+    yields (index, returncode, seconds, output) as commands finish
+    """
+    def run(index, command):
+        start = time.perf_counter()
+        process = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+        return index, process.returncode, time.perf_counter() - start, process.stdout
+    
+    with ThreadPoolExecutor(max_workers=max(jobs, 1)) as pool:
+        futures = [pool.submit(run, i, c) for i, c in enumerate(commands)]
+        for future in as_completed(futures):
+            yield future.result()
@@ -0,0 +1,182 @@
+"""
+Material usage report for .blend files
+
+Writes one record per material: users, shader type, the objects using it and how many faces they give it.
+The format follows the output extension, .jsonl or .csv.
+
+Report on the file blender opens:
+    blender -b library.blend --python tools/material_report.py -- --output report.jsonl
+Report on a folder of files, from plain python, with a blender process per file:
+    python tools/material_report.py --jobs 8 --output report.csv assets/
+"""
+
+import os, sys, csv, json, time, shutil, argparse, tempfile
+
+try:
+    import bpy
+    import numpy as np
+except ImportError:
+    ## Driver side, blender isn't needed to start the workers
+    bpy = None
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from easetool_headless import load_addon, script_args, find_blend_files, blender_command, run_pool
+
+FIELDS = ["file", "material", "users", "fake_user", "library", "shader", "objects", "faces"]
+
+
+#############################################################
+####    WORKER    ###########################################
+#############################################################
+
+def surface_shader(materials_addon, material) -> str:
+    """
+    node type connected to the surface of the active material output
+    empty without nodes or an unlinked output
+    """
+    if not material.use_nodes or material.node_tree is None:
+        return ""
+
+    output = materials_addon.active_output(material.node_tree, 'OUTPUT_MATERIAL')
+    if output is None:
+        return ""
+    links = output.inputs["Surface"].links
+    return links[0].from_node.bl_idname if links else ""
+
+
+def material_records(materials_addon):
+    """
+    usage of every material in the open file, from the objects of all scenes
+    yields one record per material
+    """
+    usage = {}
+    for obj in bpy.data.objects:
+        slots = obj.material_slots
+        if not slots:
+            continue
+
+        ## Faces per slot, indices past the last slot use the last one like blender does
+        indices = materials_addon.get_material_indices(obj.data)
+        if indices is not None and len(indices):
+            faces = np.bincount(np.minimum(indices, len(slots) - 1), minlength=len(slots))
+        else:
+            faces = np.zeros(len(slots), dtype=np.int64)
+
+        for slot, count in zip(slots, faces.tolist()):
+            if slot.material is None:
+                continue
+            objects, total = usage.get(slot.material, ([], 0))
+            if obj.name not in objects:
+                objects.append(obj.name)
+            usage[slot.material] = (objects, total + count)
+
+    file = bpy.data.filepath
+    for material in bpy.data.materials:
+        objects, faces = usage.get(material, ([], 0))
+        yield {
+            "file": file,
+            "material": material.name,
+            "users": material.users,
+            "fake_user": material.use_fake_user,
+            "library": material.library.filepath if material.library else "",
+            "shader": surface_shader(materials_addon, material),
+            "objects": objects,
+            "faces": faces,
+        }
+
+
+def open_writer(path: str):
+    """
+    record writer for path, JSON lines or CSV by extension
+    returns the file and a function writing one record
+    """
+    file = open(path, "w", newline="")
+    if path.endswith(".csv"):
+        writer = csv.DictWriter(file, fieldnames=FIELDS)
+        writer.writeheader()
+
+        def write(record):
+            writer.writerow({**record, "objects": ";".join(record["objects"])})
+    else:
+        def write(record):
+            file.write(json.dumps(record) + "\n")
+
+    return file, write
+
+
+def work(args):
+    """
+    write the report of the open file
+    written under a temporary name first, a worker failing halfway leaves no report behind
+    """
+    materials_addon = load_addon("materials", register=False)
+
+    ## Keep the extension, it picks the format
+    root, extension = os.path.splitext(args.output)
+    partial = root + ".partial" + extension
+    file, write = open_writer(partial)
+    with file:
+        for record in material_records(materials_addon):
+            write(record)
+    os.replace(partial, args.output)
+
+
+#############################################################
+####    DRIVER    ###########################################
+#############################################################
+
+def drive(args):
+    """Report every file with a pool of background blenders and merge their results"""
+    files = find_blend_files(args.paths)
+    if not files:
+        print("No .blend files found")
+        return 1
+
+    script = os.path.abspath(__file__)
+    folder = tempfile.mkdtemp(prefix="easetool_report_")
+    parts = [os.path.join(folder, "%05d.jsonl" % i) for i in range(len(files))]
+    commands = [blender_command(args.blender, f, script, ["--output", p]) for f, p in zip(files, parts)]
+
+    start = time.perf_counter()
+    failed = 0
+    for i, returncode, seconds, output in run_pool(commands, args.jobs):
+        ok = returncode == 0 and os.path.exists(parts[i])
+        failed += not ok
+        print("%-6s %8.2f s  %s" % ("ok" if ok else "FAILED", seconds, files[i]))
+        if not ok:
+            print(output)
+
+    ## Merge in file order, workers always write JSON lines
+    file, write = open_writer(args.output)
+    with file:
+        for part in parts:
+            if not os.path.exists(part):
+                continue
+            with open(part) as lines:
+                for line in lines:
+                    write(json.loads(line))
+    shutil.rmtree(folder, ignore_errors=True)
+
+    print("Reported %d files in %.2f s, %d failed, saved %s" % (len(files) - failed, time.perf_counter() - start, failed, args.output))
+    return 1 if failed else 0
+
+
+def parse_args(argv: []):
+    parser = argparse.ArgumentParser(prog="material_report.py", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", help=".blend files or folders, driver only")
+    parser.add_argument("--output", default="material_report.jsonl", help=".jsonl or .csv report file")
+    parser.add_argument("--blender", default=os.environ.get("BLENDER", "blender"), help="blender executable, driver only")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="blender processes at once, driver only")
+
+    return parser.parse_args(argv)
+
+
+def main():
+    if bpy is None:
+        sys.exit(drive(parse_args(sys.argv[1:])))
+    else:
+        work(parse_args(script_args()))
+
+
+if __name__ == "__main__":
+    main()